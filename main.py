@@ -1,13 +1,11 @@
 import sys
 import os
-import pandas as pd
 from PyQt6.QtWidgets import (
     QApplication, QWidget, QLabel, QPushButton, QVBoxLayout,
     QHBoxLayout, QComboBox, QCheckBox
 )
 from PyQt6.QtCore import QTimer, Qt
 from PyQt6.QtGui import QPixmap
-import matplotlib.pyplot as plt
 
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 TXT_DIR = os.path.join(BASE_DIR, 'TXT')
@@ -35,6 +33,7 @@ TAMAÑOS_FUENTE = {
 FUENTE_MATPLOTLIB = "Novecento Sans Wide"  # Cambia por la que tengas instalada
 
 def leer_equipos_desde_excel(path):
+    import pandas as pd  # diferido: sólo hace falta aquí
     try:
         df = pd.read_excel(path, sheet_name="equipos", header=None)
         return [str(equipo).strip() for equipo in df[0].dropna()]
@@ -157,6 +156,7 @@ class Marcador(QWidget):
         self.actualizar_marcador_imagen()
 
     def actualizar_marcador_imagen(self):
+        import matplotlib.pyplot as plt  # diferido: matplotlib tarda en importar
         # Generar imagen con matplotlib
         fig, ax = plt.subplots(figsize=(7, 2), dpi=100)
         ax.axis('off')
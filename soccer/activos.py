@@ -0,0 +1,136 @@
+import os
+import threading
+from urllib.parse import quote
+
+from comun import BASE_DIR, OUTPUT_HTML, FONDOS, rel_from_html, _fix_ext, escala_bug
+from plantel import _sha1
+
+HTML_DIR = os.path.dirname(OUTPUT_HTML)
+# Dónde pueden estar los PNG de FONDOS, en orden de preferencia
+DIRS_FONDOS = (
+    os.path.join(BASE_DIR, 'fondos'),
+    os.path.join(BASE_DIR, 'assets', 'fondos'),
+    os.path.join(HTML_DIR, 'fondos'),
+)
+
+def _externa(rel: str) -> bool:
+    return not rel or "://" in rel or rel.startswith("data:")
+
+class Manifiesto:
+    """
+    Activos de la página (escudos, fondos, marca, stats) resueltos una vez y
+    con hash de contenido: url(rel) devuelve "rel?v=<hash>". El servidor
+    sirve esas URLs como inmutables y la página las precarga todas; si el
+    archivo cambia, cambia la URL. Las rutas son relativas a TXT/.
+
+    Con `optimizador` (imagenes.Optimizador) y un `tipo`, la URL apunta a la
+    variante al tamaño de pantalla en vez de al original.
+    """
+    def __init__(self, dir_html: str = HTML_DIR, optimizador=None):
+        self.dir_html = dir_html
+        self.optimizador = optimizador
+        self._lock = threading.Lock()
+        self._entradas = {}  # (rel, tipo) -> (firma, url, ruta original, ruta variante)
+        self._preload = None
+        self._fondos = {}    # clave de FONDOS -> rel
+
+    def _resolver(self, rel: str, tipo: str = None):
+        ruta = os.path.normpath(os.path.join(self.dir_html, rel))
+        try:
+            st = os.stat(ruta)
+        except OSError:
+            return None
+        firma = (st.st_mtime_ns, st.st_size)
+        with self._lock:
+            previa = self._entradas.get((rel, tipo))
+        if previa and previa[0] == firma:
+            return previa[1]
+        huella = _sha1(ruta)[:12]
+        variante = self.optimizador.variante(ruta, huella, tipo) if (self.optimizador and tipo) else None
+        destino = os.path.relpath(variante, self.dir_html).replace('\\', '/') if variante else rel
+        url = f"{quote(destino)}?v={huella}"
+        with self._lock:
+            self._entradas[(rel, tipo)] = (firma, url, ruta, variante)
+            self._preload = None
+        return url
+
+    def url(self, rel: str, tipo: str = None) -> str:
+        """URL versionada de `rel` (sin tocar disco si ya está en el manifiesto)."""
+        if _externa(rel):
+            return rel or ""
+        rel = rel.split("?", 1)[0]
+        with self._lock:
+            entrada = self._entradas.get((rel, tipo))
+        if entrada is not None:
+            return entrada[1]
+        return self._resolver(rel, tipo) or rel  # no existe: se deja tal cual
+
+    def construir(self, team_images: dict, config: dict):
+        """Escudos de equipos.xlsx, logos del config, marca, stats y todos los FONDOS."""
+        self.fijar_escala(escala_bug(config))
+        for rel in team_images.values():
+            self.url(_fix_ext(rel), "escudo")
+        for clave in ("logo_local", "logo_visita"):
+            self.url(_fix_ext((config.get(clave) or "").strip()), "escudo")
+        self.url((config.get("brand_logo") or "").strip() or rel_from_html(os.path.join(BASE_DIR, 'assets', 'logo.png')), "marca")
+        for rel in (rel_from_html(os.path.join(BASE_DIR, 'assets', 'stats.png')), rel_from_html(os.path.join(BASE_DIR, 'stats.png'))):
+            self.url(rel, "stats")
+        for clave, nombre in FONDOS.items():
+            for carpeta in DIRS_FONDOS:
+                abs_png = os.path.join(carpeta, f"{nombre}.png")
+                if os.path.exists(abs_png):
+                    self._fondos[clave] = rel_from_html(abs_png)
+                    self.url(self._fondos[clave], "fondo")
+                    break
+        return self
+
+    def fijar_escala(self, escala: float) -> bool:
+        """
+        Escala de las variantes (--bug-scale). Si cambia, lo ya resuelto se
+        vuelve a resolver a la nueva escala. Devuelve True si cambió.
+        """
+        if self.optimizador is None or self.optimizador.escala == escala:
+            return False
+        with self._lock:
+            self.optimizador.escala = escala
+            claves = list(self._entradas)
+            self._entradas.clear()
+            self._preload = None
+        for rel, tipo in claves:
+            self._resolver(rel, tipo)
+        return True
+
+    def refrescar(self, config: dict = None) -> bool:
+        """
+        Re-hashea lo que cambió en disco (y con `config`, toma su bug_scale).
+        Devuelve True si cambió alguna URL.
+        """
+        cambio = config is not None and self.fijar_escala(escala_bug(config))
+        with self._lock:
+            entradas = dict(self._entradas)
+        for (rel, tipo), entrada in entradas.items():
+            if self._resolver(rel, tipo) != entrada[1]:
+                cambio = True
+        return cambio
+
+    def fondo(self, clave: str) -> str:
+        """URL del fondo de `clave` (o del normal); "" si no hay PNG."""
+        rel = self._fondos.get(clave) or self._fondos.get("normal")
+        return self.url(rel, "fondo") if rel else ""
+
+    def variantes(self) -> list:
+        """[(ruta original, ruta variante o None)] de todo el manifiesto."""
+        with self._lock:
+            return [(e[2], e[3]) for e in self._entradas.values()]
+
+    def urls(self) -> list:
+        with self._lock:
+            return sorted({e[1] for e in self._entradas.values()})
+
+    def preload_html(self) -> str:
+        """<link rel=preload> para todo el manifiesto (cacheado hasta que cambie)."""
+        with self._lock:
+            if self._preload is None:
+                urls = sorted({e[1] for e in self._entradas.values()})
+                self._preload = "\n".join(f'<link rel="preload" as="image" href="{u}"/>' for u in urls)
+            return self._preload
@@ -0,0 +1,156 @@
+import itertools
+
+# Prioridad por defecto de cada overlay (mayor = más importante)
+PRIORIDADES = {"goal": 30, "card": 20, "sub": 10, "stats": 0}
+# Qué hacer si ya hay otro overlay en pantalla:
+#   cola        -> espera su turno (por prioridad y orden de llegada)
+#   interrumpir -> sale ya; el interrumpido vuelve a la cola con lo que le faltaba
+#   fusionar    -> actualiza el que tenga la misma clave (en pantalla o en cola)
+POLITICAS = ("cola", "interrumpir", "fusionar")
+POLITICA_TIPO = {"goal": "interrumpir", "card": "cola", "sub": "cola", "stats": "fusionar"}
+# Si el motor llega más tarde que esto a un vencimiento, el siguiente overlay
+# cuenta su duración desde ahora y no desde el vencimiento (no se "come" tiempo)
+TOLERANCIA_MS = 100
+
+class Agenda:
+    """
+    Cola con prioridad de overlays de un partido: el que está en pantalla
+    (`actual`) y los pendientes, incluidos los programados para más tarde
+    (`desde_ms`). Sin hilos ni reloj propio: quien la usa (Partido, con su
+    lock) pasa `ahora_ms` y llama a vencer() en proximo_ms().
+
+    Al vencer uno, el siguiente arranca en ese mismo instante, así que
+    van seguidos sin hueco ni deriva.
+    """
+    def __init__(self):
+        self.actual = None
+        self._pendientes = []
+        self._ids = itertools.count(1)
+
+    # ---------- Altas ----------
+    def agregar(self, tipo: str, data: dict, fondo: str, dur_ms: int, ahora_ms: int,
+                politica: str = None, prioridad: int = None, en_ms: int = 0, clave: str = None):
+        """Encola un overlay. Devuelve (id, cambió lo que está en pantalla)."""
+        politica = politica or POLITICA_TIPO.get(tipo, "cola")
+        if politica not in POLITICAS:
+            raise ValueError(f"política desconocida: {politica!r}")
+        item = {
+            "id": next(self._ids), "tipo": tipo, "data": dict(data or {}), "fondo": fondo,
+            "dur_ms": max(0, int(dur_ms)), "prioridad": PRIORIDADES.get(tipo, 0) if prioridad is None else int(prioridad),
+            "politica": politica, "clave": clave or tipo, "desde_ms": ahora_ms + max(0, int(en_ms)), "vence_ms": 0,
+        }
+        if politica == "fusionar":
+            previo = self._buscar_clave(item["clave"])
+            if previo is not None:
+                previo["data"].update(item["data"])
+                previo["dur_ms"] = item["dur_ms"]
+                if previo is self.actual:
+                    previo["vence_ms"] = ahora_ms + item["dur_ms"]
+                    return previo["id"], True
+                return previo["id"], False
+        self._pendientes.append(item)
+        return item["id"], self.vencer(ahora_ms)
+
+    def _buscar_clave(self, clave: str):
+        if self.actual is not None and self.actual["clave"] == clave:
+            return self.actual
+        return next((it for it in self._pendientes if it["clave"] == clave), None)
+
+    def completar(self, tipo: str, filtro: dict, data: dict):
+        """
+        Agrega `data` al último overlay `tipo` (en pantalla o en cola) cuyos
+        datos coinciden con `filtro` (p. ej. el anotador de un gol que ya
+        salió). Devuelve (id, está en pantalla), o (None, False) si no hay.
+        """
+        candidatos = ([self.actual] if self.actual is not None else []) + self._pendientes
+        candidatos = [it for it in candidatos if it["tipo"] == tipo
+                      and all(it["data"].get(k) == v for k, v in filtro.items())]
+        if not candidatos:
+            return None, False
+        item = max(candidatos, key=lambda it: it["id"])
+        item["data"].update(data)
+        return item["id"], item is self.actual
+
+    # ---------- Bajas ----------
+    def cancelar(self, id_item: int, ahora_ms: int) -> bool:
+        """Quita un pendiente o baja el que está en pantalla. False si no existe."""
+        if self.actual is not None and self.actual["id"] == id_item:
+            self.actual = None
+            self.vencer(ahora_ms)
+            return True
+        n = len(self._pendientes)
+        self._pendientes = [it for it in self._pendientes if it["id"] != id_item]
+        return len(self._pendientes) != n
+
+    def ocultar(self, ahora_ms: int) -> bool:
+        """Baja el de pantalla; si hay cola, entra el siguiente."""
+        if self.actual is None:
+            return False
+        self.actual = None
+        self.vencer(ahora_ms)
+        return True
+
+    def vaciar(self):
+        self.actual = None
+        self._pendientes = []
+
+    # ---------- Tiempo ----------
+    def _elegible(self, ahora_ms: int, interrumpe: int = None):
+        """El próximo en salir; con `interrumpe`, sólo los que pueden bajar a uno de esa prioridad."""
+        listos = [it for it in self._pendientes if it["desde_ms"] <= ahora_ms
+                  and (interrumpe is None or (it["politica"] == "interrumpir" and it["prioridad"] >= interrumpe))]
+        # mayor prioridad primero; a igual prioridad, el que llegó antes
+        return min(listos, key=lambda it: (-it["prioridad"], it["id"]), default=None)
+
+    def _poner(self, item: dict, inicio_ms: int, ahora_ms: int):
+        if ahora_ms - inicio_ms > TOLERANCIA_MS:
+            inicio_ms = ahora_ms
+        self._pendientes.remove(item)
+        item["vence_ms"] = inicio_ms + item["dur_ms"]
+        self.actual = item
+
+    def vencer(self, ahora_ms: int) -> bool:
+        """Avanza la agenda hasta `ahora_ms`. True si cambió lo que está en pantalla."""
+        cambio = False
+        while True:
+            if self.actual is not None and ahora_ms >= self.actual["vence_ms"]:
+                fin = self.actual["vence_ms"]
+                self.actual = None
+                cambio = True
+                siguiente = self._elegible(ahora_ms)
+                if siguiente is not None:
+                    # justo en el borde en que venció el anterior
+                    self._poner(siguiente, max(fin, siguiente["desde_ms"]), ahora_ms)
+                continue
+            if self.actual is None:
+                siguiente = self._elegible(ahora_ms)
+                if siguiente is None:
+                    return cambio
+                self._poner(siguiente, siguiente["desde_ms"], ahora_ms)
+                cambio = True
+                continue
+            siguiente = self._elegible(ahora_ms, interrumpe=self.actual["prioridad"])
+            if siguiente is None:
+                return cambio
+            # el interrumpido vuelve a la cola (sin volver a interrumpir) con lo que le quedaba
+            interrumpido = self.actual
+            resto = interrumpido["vence_ms"] - ahora_ms
+            if resto > 0:
+                interrumpido.update(dur_ms=resto, desde_ms=ahora_ms, vence_ms=0, politica="cola")
+                self._pendientes.append(interrumpido)
+            self._poner(siguiente, max(siguiente["desde_ms"], ahora_ms), ahora_ms)
+            cambio = True
+
+    def proximo_ms(self, ahora_ms: int):
+        """Próximo instante en que la agenda cambia sola, o None."""
+        candidatos = [it["desde_ms"] for it in self._pendientes if it["desde_ms"] > ahora_ms]
+        if self.actual is not None:
+            candidatos.append(self.actual["vence_ms"])
+        return min(candidatos) if candidatos else None
+
+    # ---------- Consulta ----------
+    def pendientes(self, ahora_ms: int) -> list:
+        """El de pantalla (si hay) y los pendientes, aproximadamente en el orden en que saldrían."""
+        orden = sorted(self._pendientes, key=lambda it: (max(it["desde_ms"], ahora_ms), -it["prioridad"], it["id"]))
+        lista = [dict(self.actual, en_pantalla=True)] if self.actual is not None else []
+        return lista + [dict(it, en_pantalla=False) for it in orden]
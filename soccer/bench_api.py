@@ -0,0 +1,96 @@
+"""
+Cliente local de la API de comandos: comprueba idempotencia y mide
+comandos/s y latencia (p50/p99) contra un motor sin GUI en este proceso.
+
+Uso:  python bench_api.py [n_comandos] [hilos]
+"""
+import sys
+import json
+import time
+import threading
+import http.client
+
+from comun import obtener_config, leer_equipos
+from motor import Motor
+
+PARTIDO = "bench"
+
+def cliente(puerto: int):
+    return http.client.HTTPConnection("localhost", puerto)
+
+def enviar(conn, cuerpo, clave: str = None) -> tuple:
+    cabeceras = {"Content-Type": "application/json"}
+    if clave:
+        cabeceras["Idempotency-Key"] = clave
+    conn.request("POST", f"/match/{PARTIDO}/api", json.dumps(cuerpo), cabeceras)
+    resp = conn.getresponse()
+    return resp.status, json.loads(resp.read())
+
+def comprobar_idempotencia(puerto: int):
+    conn = cliente(puerto)
+    enviar(conn, {"cmd": "reset"})
+    s1, r1 = enviar(conn, {"cmd": "gol", "equipo": "local", "overlay": False}, clave="gol-1")
+    s2, r2 = enviar(conn, {"cmd": "gol", "equipo": "local", "overlay": False}, clave="gol-1")
+    assert s1 == s2 == 200, (s1, s2)
+    assert r2.get("repetido") and r1["version"] == r2["version"], (r1, r2)
+    assert r2["estado"]["scoreL"] == 1, r2["estado"]
+    s3, r3 = enviar(conn, {"cmd": "tarjeta", "equipo": "nadie"})
+    assert s3 == 400, r3
+    conn.close()
+    print("idempotencia OK: misma clave -> misma versión, un solo gol")
+
+# Comandos típicos de un partido (sin reset, que compacta la bitácora)
+SECUENCIA = [
+    {"cmd": "gol", "equipo": "local", "overlay": False},
+    {"cmd": "tarjeta", "equipo": "visita", "jugador": "4 Pérez", "tipo": "amarilla"},
+    {"cmd": "cambio", "equipo": "local", "sale": "9 A", "entra": "11 B"},
+    {"cmd": "toggle_reloj"},
+    {"cmd": "stats", "titulo": "Faltas", "local": 3, "visita": 5},
+    {"cmd": "toggle_reloj"},
+    {"cmd": "ocultar_overlay"},
+]
+
+def medir(puerto: int, n: int, hilos: int) -> dict:
+    latencias = []
+    lock = threading.Lock()
+    por_hilo = n // hilos
+
+    def trabajar(h):
+        conn = cliente(puerto)
+        propias = []
+        for i in range(por_hilo):
+            t0 = time.perf_counter()
+            status, _ = enviar(conn, SECUENCIA[i % len(SECUENCIA)], clave=f"{h}-{i}")
+            propias.append(time.perf_counter() - t0)
+            assert status == 200, status
+        conn.close()
+        with lock:
+            latencias.extend(propias)
+
+    t0 = time.perf_counter()
+    ts = [threading.Thread(target=trabajar, args=(h,)) for h in range(hilos)]
+    for t in ts: t.start()
+    for t in ts: t.join()
+    total = time.perf_counter() - t0
+    latencias.sort()
+    return {"n": len(latencias), "total_s": total, "cmd_s": len(latencias) / total,
+            "p50_ms": latencias[len(latencias) // 2] * 1000,
+            "p99_ms": latencias[int(len(latencias) * 0.99) - 1] * 1000}
+
+def main(n: int = 2000, hilos: int = 4):
+    _, colores, imagenes = leer_equipos()
+    motor = Motor()
+    motor.crear(PARTIDO, obtener_config(), colores, imagenes).render()
+    puerto = motor.iniciar_servidor(3390, intentos=50)
+    try:
+        comprobar_idempotencia(puerto)
+        r = medir(puerto, n, hilos)
+        print(f"{r['n']} comandos, {hilos} clientes: {r['cmd_s']:.0f} cmd/s  "
+              f"p50 {r['p50_ms']:.2f} ms  p99 {r['p99_ms']:.2f} ms")
+        print("escritor:", motor.obtener(PARTIDO).escritor.stats())
+    finally:
+        motor.cerrar()
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 2000,
+         int(sys.argv[2]) if len(sys.argv) > 2 else 4)
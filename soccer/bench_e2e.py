@@ -0,0 +1,270 @@
+"""
+Benchmark de punta a punta: de la acción en la UI (botón, panel rápido)
+a los bytes que recibe un navegador. Levanta Marcador sin pantalla
+(QT_QPA_PLATFORM=offscreen) sobre un partido aparte, juega un partido con
+guion y mide con dos clientes como los de OBS: uno por SSE (/events) y
+otro que sondea estado.json?since= cada `--sondeo` ms, como la página.
+
+Reporta latencia p50/p99 por tipo de acción, CPU y syscalls (lecturas y
+escrituras, de /proc/self/io) por tick del reloj en reposo, y bytes
+escritos a disco y enviados a los clientes. Con --json guarda el
+resultado y con --base lo compara contra uno anterior (sale con 1 si
+empeoró).
+
+Uso:  python bench_e2e.py [--rondas 3] [--sondeo 500] [--reposo 3] [--json r.json] [--base base.json]
+"""
+import os
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+import sys
+import json
+import time
+import shutil
+import argparse
+import threading
+import http.client
+
+from PyQt6.QtWidgets import QApplication, QFileDialog
+from PyQt6.QtCore import QTimer
+
+from comun import BITACORA_DIR, MATCH_DIR, CONFIG_PATH, vaciar_config
+from metricas import METRICAS
+
+PARTIDO = "bench-e2e"
+
+# ------------------ Clientes ------------------
+class Llegadas:
+    """Versión -> primer instante (perf_counter_ns) en que la vio cada cliente."""
+    def __init__(self):
+        self.cond = threading.Condition()
+        self.vistas = {"sse": {}, "sondeo": {}}
+        self.bytes = {"sse": 0, "sondeo": 0}
+
+    def anotar(self, cliente: str, version: int, n_bytes: int):
+        ahora = time.perf_counter_ns()
+        with self.cond:
+            self.vistas[cliente].setdefault(version, ahora)
+            self.bytes[cliente] += n_bytes
+            self.cond.notify_all()
+
+    def primera(self, cliente: str, version: int):
+        """Primer instante en que `cliente` vio `version` o una posterior."""
+        vistas = self.vistas[cliente]
+        return min((t for v, t in vistas.items() if v >= version), default=None)
+
+def cliente_sse(puerto: int, llegadas: Llegadas, parar: threading.Event):
+    conn = http.client.HTTPConnection("localhost", puerto, timeout=30)
+    conn.request("GET", f"/match/{PARTIDO}/events")
+    resp = conn.getresponse()
+    version = 0
+    while not parar.is_set():
+        linea = resp.fp.readline()
+        if not linea:
+            break
+        if linea.startswith(b"id: "):
+            version = int(linea[4:].rsplit(b"-", 1)[-1])  # id = "<arranque>-<versión>"
+        elif linea.startswith(b"data: "):
+            llegadas.anotar("sse", version, len(linea))
+    conn.close()
+
+def cliente_sondeo(puerto: int, llegadas: Llegadas, parar: threading.Event, activo: threading.Event, intervalo_s: float):
+    conn = http.client.HTTPConnection("localhost", puerto, timeout=10)
+    version, cursor = 0, ""
+    while not parar.is_set():
+        activo.wait()
+        conn.request("GET", f"/match/{PARTIDO}/state?since={cursor}")
+        cuerpo = conn.getresponse().read()
+        datos = json.loads(cuerpo)
+        cursor = datos.get("cursor", "")
+        if datos.get("version", 0) > version:
+            version = datos["version"]
+            llegadas.anotar("sondeo", version, len(cuerpo))
+        parar.wait(intervalo_s)
+    conn.close()
+
+# ------------------ Recursos del proceso ------------------
+def io_proceso() -> dict:
+    """syscr/syscw/wchar de /proc/self/io (sólo Linux); {} si no hay."""
+    try:
+        with open("/proc/self/io") as f:
+            return {k: int(v) for k, v in (l.split(": ") for l in f.read().splitlines())}
+    except OSError:
+        return {}
+
+def pct(valores: list, q: float) -> float:
+    orden = sorted(valores)
+    return orden[min(len(orden) - 1, int(len(orden) * q))] if orden else 0.0
+
+# ------------------ Guion ------------------
+def limpiar_agenda(partido):
+    """Cancela los overlays en cola y el que está al aire: cada acción se mide con la pantalla libre."""
+    for item in partido.overlays_pendientes():
+        partido.cancelar_overlay(item["id"])
+    if partido.agenda.actual is not None:
+        partido.cancelar_overlay(partido.agenda.actual["id"])
+
+def guion(w) -> list:
+    """[(tipo, acción)] de un partido: reloj, goles, tarjetas, cambios, stats, añadido, 2T."""
+    p = w.panel
+    plantel = {lado: w.jugadores_equipo_actual(lado) or ["1 A", "2 B"] for lado in ("local", "visita")}
+    jug = lambda lado, i: plantel[lado][i % len(plantel[lado])]
+
+    def reloj():
+        w.pause_count = 0  # sin la confirmación modal de pausa
+        w.btn_iniciar.click()
+    def tarjeta(lado, tipo, i):
+        p.iniciar(tipo); p.elegir(lado, jug(lado, i))
+    def cambio(lado, i):
+        p.iniciar("sale"); p.elegir(lado, jug(lado, i)); p.elegir(lado, jug(lado, i + 1))
+    def gol(lado, i):
+        w.gol(lado); p.elegir(lado, jug(lado, i))  # overlay al instante, anotador después
+    def stats(titulo):
+        w.mostrar_overlay("stats", {"titulo": titulo, "local": 3, "visita": 5}, fondo_key="stats", dur_ms=300)
+    def anadido(minutos):
+        w.extra_spin.setValue(minutos); w.aplicar_tiempo_anadido()
+
+    pasos = []
+    for periodo in (1, 2):
+        pasos += [("periodo", lambda n=periodo: w.set_periodo(n)), ("reloj", reloj)]
+        pasos += [("gol", lambda: gol("local", 0)), ("tarjeta", lambda: tarjeta("visita", "amarilla", 1)),
+                  ("stats", lambda: stats("Faltas")), ("reloj", reloj), ("reloj", reloj),
+                  ("cambio", lambda: cambio("local", 2)), ("gol", lambda: gol("visita", 3)),
+                  ("tarjeta", lambda: tarjeta("local", "roja", 4)), ("stats", lambda: stats("Posesión %")),
+                  ("cambio", lambda: cambio("visita", 5)), ("ocultar", w.partido.ocultar_overlay),
+                  ("anadido", lambda: anadido(3)), ("reloj", reloj), ("reloj", reloj)]
+    return pasos
+
+# ------------------ Benchmark ------------------
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--rondas", type=int, default=3)
+    ap.add_argument("--sondeo", type=int, default=500, help="intervalo del cliente que sondea (ms)")
+    ap.add_argument("--reposo", type=float, default=3.0, help="segundos de reloj corriendo sin eventos")
+    ap.add_argument("--json", help="guardar el resultado en este archivo")
+    ap.add_argument("--base", help="comparar contra un resultado anterior")
+    ap.add_argument("--tolerancia", type=float, default=1.5, help="empeora si supera base x tolerancia")
+    args = ap.parse_args()
+
+    with open(CONFIG_PATH, "rb") as f:
+        config_original = f.read()  # la app guarda config.json; se restaura al final
+    QFileDialog.getOpenFileName = staticmethod(lambda *a, **k: ("", ""))  # sin diálogos de logos
+    app = QApplication(sys.argv)
+    import app as marcador_app  # después de QApplication (perfil de arranque incluido)
+    w = marcador_app.Marcador(PARTIDO)
+    w.show()
+
+    def bombear(s: float):
+        fin = time.perf_counter() + s
+        while time.perf_counter() < fin:
+            app.processEvents()
+            time.sleep(0.001)
+
+    llegadas, parar, sondeo_activo = Llegadas(), threading.Event(), threading.Event()
+    sondeo_activo.set()
+    hilos = [threading.Thread(target=cliente_sse, args=(w.http_port, llegadas, parar), daemon=True),
+             threading.Thread(target=cliente_sondeo, args=(w.http_port, llegadas, parar, sondeo_activo, args.sondeo / 1000), daemon=True)]
+    for h in hilos: h.start()
+    w.partido.reset()
+    bombear(1.0)
+
+    escrito0 = sum(p["escritor"]["bytes"] for p in w.motor.metricas()["partidos"].values())
+    latencias = {"sse": {}, "sondeo": {}}
+    espera_max_s = args.sondeo / 1000 * 2 + 1
+    try:
+        for _ in range(args.rondas):
+            for tipo, accion in guion(w):
+                if tipo != "ocultar":
+                    limpiar_agenda(w.partido); bombear(0.02)
+                antes = w.partido.difusor.version
+                t0 = time.perf_counter_ns()
+                accion()
+                objetivo = w.partido.difusor.version
+                if objetivo == antes:
+                    continue  # la acción no cambió nada visible
+                limite = time.perf_counter() + espera_max_s
+                while time.perf_counter() < limite:
+                    app.processEvents()
+                    with llegadas.cond:
+                        if llegadas.primera("sse", objetivo) and llegadas.primera("sondeo", objetivo):
+                            break
+                        llegadas.cond.wait(0.001)
+                for cliente in ("sse", "sondeo"):
+                    t = llegadas.primera(cliente, objetivo)
+                    if t is not None:
+                        latencias[cliente].setdefault(tipo, []).append((t - t0) / 1e6)
+                bombear(0.02)
+
+        # Reposo: reloj corriendo, sin eventos ni sondeo (coste de un tick)
+        if not w.partido.running:
+            w.pause_count = 0; w.btn_iniciar.click()
+        limpiar_agenda(w.partido)
+        sondeo_activo.clear(); bombear(0.6)
+        # el bucle de eventos real de Qt, para no contar el CPU de bombear()
+        QTimer.singleShot(int(args.reposo * 1000), lambda: app.exit(0))  # quit() intentaría cerrar la ventana
+        ticks0, cpu0, io0 = METRICAS.foto()["contadores"].get("ticks_ui", 0), time.process_time(), io_proceso()
+        app.exec()
+        ticks = METRICAS.foto()["contadores"].get("ticks_ui", 0) - ticks0
+        cpu, io1 = time.process_time() - cpu0, io_proceso()
+        sondeo_activo.set()
+    finally:
+        parar.set()
+        escrito = sum(p["escritor"]["bytes"] for p in w.motor.metricas()["partidos"].values()) - escrito0
+        render = METRICAS.foto()["etapas"].get("render", {})
+        w._allow_close = True
+        w.close()
+        for carpeta in (BITACORA_DIR, MATCH_DIR):
+            shutil.rmtree(os.path.join(carpeta, PARTIDO), ignore_errors=True)
+        vaciar_config()
+        with open(CONFIG_PATH, "wb") as f:
+            f.write(config_original)
+
+    # ------------------ Reporte ------------------
+    resultado = {"rondas": args.rondas, "sondeo_ms": args.sondeo, "latencia_ms": {}}
+    print(f"{'acción':<10}{'n':>5}{'SSE p50':>10}{'SSE p99':>10}{'sondeo p50':>12}{'sondeo p99':>12}")
+    for tipo in sorted(set(latencias["sse"]) | set(latencias["sondeo"])):
+        sse, son = latencias["sse"].get(tipo, []), latencias["sondeo"].get(tipo, [])
+        fila = {"n": len(sse), "sse_p50": pct(sse, .5), "sse_p99": pct(sse, .99),
+                "sondeo_p50": pct(son, .5), "sondeo_p99": pct(son, .99)}
+        resultado["latencia_ms"][tipo] = fila
+        print(f"{tipo:<10}{fila['n']:>5}{fila['sse_p50']:>10.2f}{fila['sse_p99']:>10.2f}"
+              f"{fila['sondeo_p50']:>12.1f}{fila['sondeo_p99']:>12.1f}")
+    todas_sse = [x for v in latencias["sse"].values() for x in v]
+    todas_son = [x for v in latencias["sondeo"].values() for x in v]
+    resultado["total"] = {"sse_p50": pct(todas_sse, .5), "sse_p99": pct(todas_sse, .99),
+                          "sondeo_p50": pct(todas_son, .5), "sondeo_p99": pct(todas_son, .99)}
+    print(f"{'TOTAL':<10}{len(todas_sse):>5}{resultado['total']['sse_p50']:>10.2f}{resultado['total']['sse_p99']:>10.2f}"
+          f"{resultado['total']['sondeo_p50']:>12.1f}{resultado['total']['sondeo_p99']:>12.1f}")
+
+    resultado["tick"] = {"ticks": ticks, "cpu_ms": cpu * 1000 / ticks if ticks else 0.0}
+    if io0 and io1:
+        resultado["tick"]["syscalls"] = (io1["syscr"] + io1["syscw"] - io0["syscr"] - io0["syscw"]) / ticks if ticks else 0.0
+        resultado["tick"]["bytes"] = (io1["wchar"] - io0["wchar"]) / ticks if ticks else 0.0
+    resultado["bytes"] = {"disco": escrito, "sse": llegadas.bytes["sse"], "sondeo": llegadas.bytes["sondeo"]}
+    resultado["render"] = render
+    t = resultado["tick"]
+    print(f"reposo {args.reposo:.0f}s: {t['ticks']} ticks, CPU {t['cpu_ms']:.3f} ms/tick"
+          + (f", {t['syscalls']:.1f} syscalls/tick, {t['bytes']:.0f} B escritos/tick" if "syscalls" in t else ""))
+    print(f"bytes: disco {escrito / 1024:.1f} KB, SSE {llegadas.bytes['sse'] / 1024:.1f} KB, "
+          f"sondeo {llegadas.bytes['sondeo'] / 1024:.1f} KB; render p99 {render.get('p99_ms', 0):.2f} ms")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(resultado, f, ensure_ascii=False, indent=2)
+    if args.base:
+        with open(args.base, encoding="utf-8") as f:
+            base = json.load(f)
+        peores = []
+        for clave in ("sse_p50", "sse_p99"):
+            viejo, nuevo = base["total"][clave], resultado["total"][clave]
+            if nuevo > viejo * args.tolerancia and nuevo - viejo > 1.0:
+                peores.append(f"{clave}: {viejo:.2f} -> {nuevo:.2f} ms")
+        viejo, nuevo = base["tick"]["cpu_ms"], resultado["tick"]["cpu_ms"]
+        if nuevo > viejo * args.tolerancia and nuevo - viejo > 0.05:
+            peores.append(f"CPU/tick: {viejo:.3f} -> {nuevo:.3f} ms")
+        if resultado["bytes"]["disco"] > base["bytes"]["disco"] * args.tolerancia:
+            peores.append(f"bytes a disco: {base['bytes']['disco']} -> {resultado['bytes']['disco']}")
+        print("contra la base: " + ("; ".join(peores) if peores else "sin regresiones"))
+        sys.exit(1 if peores else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""
+Benchmark de la sustitución de huecos en la plantilla actual: una cadena
+de str.replace (la técnica que usaba actualizar_html) contra la plantilla
+compilada (trozos + huecos, un solo join), las dos sobre el mismo
+PLANTILLA_HTML.
+
+No es el actualizar_html original: aquel además armaba los overlays con
+f-strings y pegaba el <script> en cada render, sobre otra plantilla. El
+speedup mide sólo la técnica de sustitución.
+
+Uso:  python bench_plantilla.py [n_estados]
+"""
+import sys
+import time
+import random
+import tracemalloc
+
+from plantilla import PLANTILLA_HTML, PLANTILLA
+
+# Orden de la cadena de .replace() de actualizar_html, con los huecos agregados después
+ORDEN_REPLACE = [
+    "BASE_HREF", "PRELOAD", "RUTA_DATOS", "BUG_SCALE", "COLOR_LOCAL", "COLOR_VISITA", "COLOR_TEXT_LOCAL", "COLOR_TEXT_VISITA",
+    "BRAND", "STATSPNG", "RELOJ", "EXTRA_TXT", "EXTRA_CLASS",
+    "CREST_MID_L", "CREST_MID_R", "REDS_L", "REDS_R", "TEAM_L", "TEAM_R",
+    "SCORE_L", "SCORE_R",
+]
+
+def generar_estados(n: int, semilla: int = 7) -> list:
+    rnd = random.Random(semilla)
+    equipos = ["UP AGS", "ANÁHUAC NTE", "TEC MTY", "UDEM", "LA SALLE", "UVM"]
+    estados = []
+    for i in range(n):
+        m, s = divmod(i, 60)
+        estados.append({
+            "BASE_HREF": "", "RUTA_DATOS": "", "BUG_SCALE": "1.00",
+            "PRELOAD": '<link rel="preload" as="image" href="../assets/logo.png?v=0123456789ab"/>',
+            "COLOR_LOCAL": "#D32F2F", "COLOR_VISITA": "#1976D2",
+            "COLOR_TEXT_LOCAL": "#ffffff", "COLOR_TEXT_VISITA": "#ffffff",
+            "BRAND": "../assets/logo.png", "STATSPNG": "../stats.png",
+            "RELOJ": f"{m:02}:{s:02}",
+            "EXTRA_TXT": "", "EXTRA_CLASS": "",
+            "CREST_MID_L": "<img class='crest' src='assets/panteras-up.png' alt=''/>",
+            "CREST_MID_R": "<img class='crest' src='assets/leones-anahuac.png' alt=''/>",
+            "REDS_L": "<span class='rc'></span>" * rnd.randint(0, 2),
+            "REDS_R": "<span class='rc'></span>" * rnd.randint(0, 2),
+            "TEAM_L": rnd.choice(equipos), "TEAM_R": rnd.choice(equipos),
+            "SCORE_L": str(rnd.randint(0, 5)), "SCORE_R": str(rnd.randint(0, 5)),
+        })
+    return estados
+
+def render_replace(valores: dict) -> str:
+    html = PLANTILLA_HTML
+    for nombre in ORDEN_REPLACE:
+        html = html.replace(f"%%{nombre}%%", valores[nombre])
+    return html
+
+def render_compilado(valores: dict) -> str:
+    return PLANTILLA.render(valores)
+
+def medir(nombre: str, fn, estados: list) -> dict:
+    # tiempo (sin tracemalloc, que distorsiona)
+    t0 = time.perf_counter()
+    for v in estados:
+        fn(v)
+    dt = time.perf_counter() - t0
+
+    # memoria: pico transitorio de cada render (copias intermedias incluidas)
+    tracemalloc.start()
+    picos = 0
+    for v in estados:
+        tracemalloc.reset_peak()
+        antes = tracemalloc.get_traced_memory()[0]
+        html = fn(v)
+        picos += tracemalloc.get_traced_memory()[1] - antes
+        del html
+    tracemalloc.stop()
+
+    return {"nombre": nombre, "total_s": dt, "us_por_render": dt / len(estados) * 1e6,
+            "pico_kb": picos / len(estados) / 1024, "asignado_mb": picos / (1024 * 1024)}
+
+def main(n: int = 10_000):
+    estados = generar_estados(n)
+    # Ambas rutas deben producir exactamente el mismo HTML
+    for v in estados[:50]:
+        assert render_replace(v) == render_compilado(v)
+
+    filas = [medir(f"replace x{len(ORDEN_REPLACE)}", render_replace, estados),
+             medir("compilada", render_compilado, estados)]
+    print(f"{n} estados, plantilla de {len(PLANTILLA_HTML)} bytes")
+    print(f"{'ruta':<14}{'total (s)':>11}{'µs/render':>12}{'pico/render (KB)':>18}{'Σ picos (MB)':>14}")
+    for f in filas:
+        print(f"{f['nombre']:<14}{f['total_s']:>11.3f}{f['us_por_render']:>12.1f}{f['pico_kb']:>18.1f}{f['asignado_mb']:>14.1f}")
+    base, nuevo = filas
+    print(f"speedup de la sustitución (misma plantilla; no contra el actualizar_html original): "
+          f"{base['total_s'] / nuevo['total_s']:.1f}x")
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 10_000)
@@ -0,0 +1,152 @@
+import os
+import json
+import time
+import copy
+import threading
+
+from escritor import escribir_atomico
+
+# Estado del partido que se puede reconstruir sólo con la bitácora
+ESTADO_INICIAL = {
+    "marcador_local": 0, "marcador_visita": 0,
+    "red_local": 0, "red_visita": 0,
+    "running": False, "start_epoch_ms": 0, "elapsed_ms": 0,
+    "periodo": 1, "tiempo_anadido_min": 0, "mostrar_extra": False,
+    "goles": [], "tarjetas": [], "cambios": [],
+}
+
+def aplicar_evento(estado: dict, ev: dict) -> dict:
+    """Reducer: aplica un evento de la bitácora sobre `estado` (in place) y lo devuelve."""
+    tipo = ev.get("tipo")
+    lado = ev.get("equipo", "local")
+    if tipo == "gol":
+        estado["marcador_local" if lado == "local" else "marcador_visita"] += 1
+        estado["goles"].append({"seq": ev["seq"], "equipo": lado, "jugador": "", "reloj": ev.get("reloj", "")})
+    elif tipo == "anotador":
+        # el anotador llega después del gol: se completa el último gol de ese lado
+        for g in reversed(estado["goles"]):
+            if g["equipo"] == lado:
+                g["jugador"] = ev.get("jugador", ""); break
+    elif tipo == "tarjeta":
+        if ev.get("tipo_tarjeta") == "roja":
+            estado["red_local" if lado == "local" else "red_visita"] += 1
+        estado["tarjetas"].append({k: ev.get(k, "") for k in ("seq", "equipo", "jugador", "tipo_tarjeta", "reloj")})
+    elif tipo == "cambio":
+        estado["cambios"].append({k: ev.get(k, "") for k in ("seq", "equipo", "sale", "entra", "reloj")})
+    elif tipo == "reloj":
+        for k in ("running", "start_epoch_ms", "elapsed_ms"):
+            if k in ev: estado[k] = ev[k]
+    elif tipo == "extra":
+        estado["tiempo_anadido_min"] = int(ev.get("minutos", 0))
+        estado["mostrar_extra"] = estado["tiempo_anadido_min"] > 0
+        estado["running"] = False; estado["start_epoch_ms"] = 0
+    elif tipo == "periodo":
+        estado["periodo"] = 2 if ev.get("periodo") == 2 else 1
+        estado.update({"running": False, "start_epoch_ms": 0, "elapsed_ms": 0, "mostrar_extra": False})
+    elif tipo == "reset":
+        estado.clear(); estado.update(copy.deepcopy(ESTADO_INICIAL))
+    return estado
+
+class Bitacora:
+    """
+    Bitácora de eventos del partido, sólo-agregar (JSONL).
+
+    Cada evento se escribe al SO en el momento (sobrevive a que el proceso
+    muera); el fsync a disco se agrupa cada `fsync_ms` en un hilo aparte.
+    Cada `cada_snapshot` eventos se guarda una foto del estado y se trunca
+    la bitácora, para que recuperar() sólo re-aplique la cola reciente.
+    """
+    def __init__(self, carpeta: str, cada_snapshot: int = 500, fsync_ms: int = 200):
+        os.makedirs(carpeta, exist_ok=True)
+        self.ruta_log = os.path.join(carpeta, "bitacora.jsonl")
+        self.ruta_snapshot = os.path.join(carpeta, "snapshot.json")
+        self.cada_snapshot = cada_snapshot
+        self.fsync_s = fsync_ms / 1000
+        self._lock = threading.Lock()
+        self._sucio = False
+        self._f = None
+        self.seq = 0
+        self.desde_snapshot = 0
+        self.estado = copy.deepcopy(ESTADO_INICIAL)
+        self._activo = threading.Event(); self._activo.set()
+        self._hilo = threading.Thread(target=self._bucle_fsync, name="bitacora-fsync", daemon=True)
+
+    # ---------- Recuperación ----------
+    def recuperar(self) -> dict:
+        """Snapshot + re-aplicar los eventos posteriores. Abre la bitácora para agregar."""
+        estado, seq = copy.deepcopy(ESTADO_INICIAL), 0
+        try:
+            with open(self.ruta_snapshot, "r", encoding="utf-8") as f:
+                snap = json.load(f)
+            estado.update(snap.get("estado", {})); seq = int(snap.get("seq", 0))
+        except (OSError, ValueError):
+            pass
+        n = 0
+        try:
+            with open(self.ruta_log, "r", encoding="utf-8") as f:
+                for linea in f:
+                    try:
+                        ev = json.loads(linea)
+                    except ValueError:
+                        break  # última línea cortada por un cierre abrupto
+                    if ev.get("seq", 0) <= seq:
+                        continue  # ya incluida en el snapshot
+                    aplicar_evento(estado, ev); seq = ev["seq"]; n += 1
+        except OSError:
+            pass
+        with self._lock:
+            self.estado, self.seq, self.desde_snapshot = estado, seq, n
+            self._f = open(self.ruta_log, "a", encoding="utf-8")
+        if not self._hilo.is_alive():
+            self._hilo.start()
+        return copy.deepcopy(estado)
+
+    # ---------- Escritura ----------
+    def registrar(self, tipo: str, **datos) -> dict:
+        with self._lock:
+            self.seq += 1
+            ev = {"seq": self.seq, "t": int(time.time() * 1000), "tipo": tipo, **datos}
+            aplicar_evento(self.estado, ev)
+            if self._f is not None:
+                self._f.write(json.dumps(ev, ensure_ascii=False) + "\n")
+                self._f.flush()
+                self._sucio = True
+            self.desde_snapshot += 1
+            compactar = self.desde_snapshot >= self.cada_snapshot
+        if compactar:
+            self.snapshot()
+        return ev
+
+    def snapshot(self):
+        """Foto atómica del estado y truncado de la bitácora."""
+        with self._lock:
+            datos = json.dumps({"seq": self.seq, "estado": self.estado}, ensure_ascii=False).encode("utf-8")
+            escribir_atomico(self.ruta_snapshot, datos, fsync=True)
+            # si el proceso muere aquí, recuperar() ignora los seq <= snapshot
+            if self._f is not None:
+                self._f.close()
+                self._f = open(self.ruta_log, "w", encoding="utf-8")
+            self.desde_snapshot = 0
+            self._sucio = False
+
+    def _bucle_fsync(self):
+        while self._activo.is_set():
+            time.sleep(self.fsync_s)
+            self._fsync()
+
+    def _fsync(self):
+        with self._lock:
+            if self._f is None or not self._sucio:
+                return
+            try:
+                os.fsync(self._f.fileno())
+            except OSError:
+                pass
+            self._sucio = False
+
+    def cerrar(self):
+        self._activo.clear()
+        self._fsync()
+        with self._lock:
+            if self._f is not None:
+                self._f.close(); self._f = None
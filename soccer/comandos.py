@@ -0,0 +1,182 @@
+import threading
+from collections import OrderedDict
+
+from comun import FONDOS
+from agenda import POLITICAS
+import diario
+
+class ErrorComando(ValueError):
+    """Comando mal formado o desconocido (se responde 400)."""
+
+# ------------------ Argumentos ------------------
+def _lado(args: dict) -> str:
+    equipo = args.get("equipo", "local")
+    if equipo not in ("local", "visita"):
+        raise ErrorComando(f"equipo debe ser 'local' o 'visita', no {equipo!r}")
+    return equipo
+
+def _entero(args: dict, clave: str, defecto: int = 0) -> int:
+    try:
+        return int(args.get(clave, defecto))
+    except (TypeError, ValueError):
+        raise ErrorComando(f"{clave} debe ser un entero")
+
+def _texto(args: dict, clave: str) -> str:
+    return str(args.get(clave) or "").strip()
+
+def _agenda(a: dict) -> dict:
+    """Opciones de agenda de un overlay: politica, prioridad, en_ms, clave (todas opcionales)."""
+    politica = a.get("politica")
+    if politica is not None and politica not in POLITICAS:
+        raise ErrorComando(f"politica debe ser una de {', '.join(POLITICAS)}")
+    opciones = {"politica": politica, "en_ms": _entero(a, "en_ms", 0), "clave": _texto(a, "clave_overlay") or None}
+    if a.get("prioridad") is not None:
+        opciones["prioridad"] = _entero(a, "prioridad")
+    return opciones
+
+def _tarjeta(p, a):
+    tipo = a.get("tipo", "amarilla")
+    if tipo not in ("amarilla", "roja"):
+        raise ErrorComando("tipo debe ser 'amarilla' o 'roja'")
+    p.tarjeta(_lado(a), _texto(a, "jugador"), tipo, dur_ms=_entero(a, "dur_ms", 5500))
+
+def _gol(p, a):
+    equipo = _lado(a)
+    p.gol(equipo)
+    jugador = _texto(a, "jugador")
+    if jugador:
+        # sin completar: el jugador ya va en los datos de este overlay, y completar
+        # pisaría el de un gol anterior de `equipo` que siga en pantalla o en cola
+        p.anotador(equipo, jugador, completar=False)
+    if a.get("overlay", True):
+        return p.mostrar_overlay("goal", {"equipo": equipo, "local": p.marcador_local, "visita": p.marcador_visita,
+                                          "jugador": jugador}, fondo_key="normal", dur_ms=_entero(a, "dur_ms", 5500),
+                                 **_agenda(a))
+
+def _overlay(p, a):
+    tipo = a.get("tipo")
+    if tipo not in ("stats", "goal", "card", "sub"):
+        raise ErrorComando("tipo de overlay desconocido")
+    fondo = a.get("fondo", "stats")
+    if fondo not in FONDOS:
+        raise ErrorComando(f"fondo desconocido: {fondo!r}")
+    return p.mostrar_overlay(tipo, dict(a.get("data") or {}), fondo_key=fondo, dur_ms=_entero(a, "dur_ms", 6000),
+                             **_agenda(a))
+
+def _stats(p, a):
+    titulo = _texto(a, "titulo") or "Stats"
+    opciones = _agenda(a)
+    # fusionar por título: un segundo "Faltas" actualiza el que ya está/espera
+    opciones["clave"] = opciones["clave"] or f"stats:{titulo}"
+    return p.mostrar_overlay("stats", {"titulo": titulo, "local": _entero(a, "local"), "visita": _entero(a, "visita")},
+                             fondo_key="stats", dur_ms=_entero(a, "dur_ms", 7000), **opciones)
+
+def _cancelar_overlay(p, a):
+    if not p.cancelar_overlay(_entero(a, "id", -1)):
+        raise ErrorComando("no hay overlay pendiente con ese id")
+    return True
+
+# Mismas transiciones que los botones y diálogos de Marcador
+COMANDOS = {
+    "estado": lambda p, a: None,
+    "gol": _gol,
+    "anotador": lambda p, a: p.anotador(_lado(a), _texto(a, "jugador")),
+    "tarjeta": _tarjeta,
+    "cambio": lambda p, a: p.cambio(_lado(a), _texto(a, "sale"), _texto(a, "entra"), dur_ms=_entero(a, "dur_ms", 5500)),
+    "stats": _stats,
+    "overlay": _overlay,
+    "ocultar_overlay": lambda p, a: p.ocultar_overlay(),
+    "overlays": lambda p, a: p.overlays_pendientes(),
+    "cancelar_overlay": _cancelar_overlay,
+    "toggle_reloj": lambda p, a: p.toggle_reloj(),
+    "iniciar_reloj": lambda p, a: p.iniciar_reloj(),
+    "pausar_reloj": lambda p, a: p.pausar_reloj(),
+    "set_periodo": lambda p, a: p.set_periodo(_entero(a, "periodo", 1)),
+    "tiempo_anadido": lambda p, a: p.tiempo_anadido(_entero(a, "minutos")),
+    "equipos": lambda p, a: p.set_equipos(a.get("local"), a.get("visita")),
+    "reset": lambda p, a: p.reset(),
+}
+
+# ------------------ Ejecución ------------------
+class Comandos:
+    """
+    API de control sin GUI: {"cmd": "gol", "equipo": "local", ...} sobre un
+    partido del motor. Responde {"ok", "version", "estado"} ya renderizado,
+    más "resultado" si el comando devuelve algo (id del overlay agendado,
+    lista de "overlays" pendientes...).
+
+    Con clave de idempotencia (cabecera Idempotency-Key o campo "clave"),
+    repetir el mismo comando devuelve la respuesta original sin volver a
+    aplicarlo; se recuerdan las últimas `max_claves`.
+    """
+    def __init__(self, motor, max_claves: int = 4096):
+        self.motor = motor
+        self.max_claves = max_claves
+        self._lock = threading.Lock()
+        self._hechos = OrderedDict()
+        self.ejecutados = 0
+        self.repetidos = 0
+
+    def ejecutar(self, id_partido, cuerpo, clave: str = None):
+        """(id_partido o None = principal, dict o lista de dicts) -> (status HTTP, respuesta)."""
+        if isinstance(cuerpo, list):
+            # lote: se aplica en orden; con Idempotency-Key cada comando toma "<clave>:<i>",
+            # si no, cada uno lleva (o no) su propia "clave"
+            respuestas = [self.ejecutar(id_partido, c, f"{clave}:{i}" if clave else None)[1]
+                          for i, c in enumerate(cuerpo)]
+            return 200, respuestas
+        if not isinstance(cuerpo, dict):
+            return 400, {"ok": False, "error": "se esperaba un objeto JSON"}
+
+        clave = clave or cuerpo.get("clave")
+        if not clave:
+            return self._aplicar(id_partido, cuerpo)
+
+        k = (id_partido, str(clave))
+        with self._lock:
+            hecho = self._hechos.get(k)
+            propio = hecho is None
+            if propio:
+                hecho = self._hechos[k] = {"listo": threading.Event(), "respuesta": None}
+                while len(self._hechos) > self.max_claves:
+                    self._hechos.popitem(last=False)
+            else:
+                self._hechos.move_to_end(k)
+        if not propio:
+            # mismo comando reintentado (o aún en curso en otro hilo)
+            hecho["listo"].wait(5)
+            with self._lock:
+                self.repetidos += 1
+            status, respuesta = hecho["respuesta"] or (409, {"ok": False, "error": "comando en curso"})
+            return status, {**respuesta, "repetido": True}
+
+        status, respuesta = self._aplicar(id_partido, cuerpo)
+        if status >= 400:
+            with self._lock:
+                self._hechos.pop(k, None)  # un error no consume la clave
+        hecho["respuesta"] = (status, respuesta)
+        hecho["listo"].set()
+        return status, respuesta
+
+    def _aplicar(self, id_partido, cuerpo: dict):
+        nombre = cuerpo.get("cmd")
+        fn = COMANDOS.get(nombre)
+        if fn is None:
+            return 400, {"ok": False, "error": f"comando desconocido: {nombre!r}"}
+        partido = self.motor.principal() if id_partido is None else self.motor.obtener(id_partido)
+        if partido is None:
+            return 404, {"ok": False, "error": "Partido no encontrado"}
+        try:
+            resultado = fn(partido, cuerpo)
+        except ErrorComando as e:
+            return 400, {"ok": False, "cmd": nombre, "error": str(e)}
+        except Exception as e:
+            diario.error("comandos", e, partido=partido.id, cmd=nombre)
+            return 500, {"ok": False, "cmd": nombre, "error": str(e)}
+        with self._lock:  # se llama desde los hilos del pool HTTP
+            self.ejecutados += 1
+        version, estado = partido.foto()
+        respuesta = {"ok": True, "cmd": nombre, "partido": partido.id, "version": version, "estado": estado}
+        if resultado is not None:
+            respuesta["resultado"] = resultado
+        return 200, respuesta
@@ -0,0 +1,218 @@
+import os
+import re
+import sys
+import json
+import atexit
+
+from escritor import escribir_atomico
+from persistencia import PersistenciaConfig, serializar_config
+from plantel import Plantel, cargar_libro
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+EXCEL_PATH = os.path.join(BASE_DIR, 'equipos.xlsx')
+JUGADORES_PATH = os.path.join(BASE_DIR, 'jugadores.xlsx')
+CONFIG_PATH = os.path.join(BASE_DIR, 'config.json')
+OUTPUT_HTML = os.path.join(BASE_DIR, 'TXT', 'salida.html')
+OUTPUT_STATE = os.path.join(BASE_DIR, 'TXT', 'estado.json')
+BITACORA_DIR = os.path.join(BASE_DIR, 'bitacora')
+# Partidos adicionales: TXT/match/<id>/salida.html + estado.json
+MATCH_DIR = os.path.join(BASE_DIR, 'TXT', 'match')
+# Líneas de tiempo de repeticion.Grabador
+GRABACIONES_DIR = os.path.join(BASE_DIR, 'grabaciones')
+CACHE_DIR = os.path.join(BASE_DIR, 'cache')
+EQUIPOS_CACHE = os.path.join(CACHE_DIR, 'equipos.pkl')
+JUGADORES_CACHE = os.path.join(CACHE_DIR, 'jugadores.pkl')
+os.makedirs(os.path.dirname(OUTPUT_HTML), exist_ok=True)
+
+FONDOS = {
+    "normal": "marcador-soccer-partido",
+    "gol_local": "marcador-soccer-local-gol",
+    "gol_visita": "marcador-soccer-visita-gol",
+    "cambio_local": "marcador-soccer-cambio-local",
+    "cambio_visita": "marcador-soccer-cambio-visita",
+    "tarjeta_local": "marcador-soccer-tarjeta-local",
+    "tarjeta_visita": "marcador-soccer-tarjeta-visita",
+    "tiempo_extra": "marcador-soccer-extra",
+    "stats": "marcador-soccer-stats"
+}
+
+# ------------------ Config ------------------
+def cargar_config():
+    if os.path.exists(CONFIG_PATH):
+        try:
+            with open(CONFIG_PATH,'r',encoding='utf-8') as f:
+                return json.load(f)
+        except:
+            pass
+    cfg = {
+        "fondos": FONDOS,
+        "posiciones": {
+            tipo: {
+                "marcador_local":{"top":35,"left":190},
+                "marcador_visita":{"top":35,"left":300},
+                "equipo_local":{"top":80,"left":90},
+                "equipo_visita":{"top":80,"left":310},
+                "reloj":{"top":110,"left":250}
+            } for tipo in FONDOS
+        },
+        "animaciones": {tipo:"slideInDown" for tipo in FONDOS},
+        "fuente":"Arial",
+        "equipo_local":"Equipo A",
+        "equipo_visita":"Equipo B",
+        "marcador_local":0,
+        "marcador_visita":0,
+        "brand_logo": "",
+        "logo_local": "",
+        "logo_visita": "",
+        # ---- nuevos campos para reloj persistente ----
+        "running": False,
+        "start_epoch_ms": 0,
+        "elapsed_ms": 0
+    }
+    escribir_atomico(CONFIG_PATH, serializar_config(cfg))
+    return cfg
+
+# Config compartido en memoria: launcher, Configuracion y Marcador usan el mismo dict
+_config = None
+
+def obtener_config():
+    global _config
+    if _config is None:
+        _config = cargar_config()
+    return _config
+
+# Guardado de config.json en segundo plano (junta ráfagas de botones)
+_persistencia = None
+
+def guardar_config(cfg):
+    global _persistencia
+    if _persistencia is None:
+        _persistencia = PersistenciaConfig(CONFIG_PATH)
+        atexit.register(_persistencia.detener)
+    _persistencia.guardar(cfg)
+
+def vaciar_config():
+    """Fuerza el guardado pendiente de config.json (p. ej. al cerrar)."""
+    if _persistencia is not None:
+        _persistencia.vaciar()
+
+def escala_bug(config: dict) -> float:
+    """Escala del bug: `--bug-scale X` en la línea de comandos o config["bug_scale"]."""
+    valor = config.get("bug_scale", 1.0)
+    for i, arg in enumerate(sys.argv):
+        if arg == "--bug-scale" and i + 1 < len(sys.argv):
+            valor = sys.argv[i + 1]
+        elif arg.startswith("--bug-scale="):
+            valor = arg.split("=", 1)[1]
+    try:
+        return min(4.0, max(0.1, float(valor)))
+    except (TypeError, ValueError):
+        return 1.0
+
+# ------------------ Utils ------------------
+_HEX_RE = re.compile(r"^#?[0-9a-fA-F]{6}$")
+
+def _normalize_hex_color(s: str) -> str:
+    if not s:
+        return ""
+    s = s.strip()
+    if _HEX_RE.match(s):
+        return s if s.startswith("#") else f"#{s}"
+    return ""
+
+def _contrast_text(hex_color: str) -> str:
+    try:
+        hc = _normalize_hex_color(hex_color)
+        r = int(hc[1:3], 16); g = int(hc[3:5], 16); b = int(hc[5:7], 16)
+        luminance = 0.2126*r + 0.7152*g + 0.0722*b
+        return "#000000" if luminance > 160 else "#ffffff"
+    except Exception:
+        return "#ffffff"
+
+def rel_from_html(abs_path: str) -> str:
+    try:
+        if abs_path and os.path.exists(abs_path):
+            return os.path.relpath(abs_path, os.path.dirname(OUTPUT_HTML)).replace('\\','/')
+    except Exception:
+        pass
+    return ""
+
+def _fix_ext(p):
+    if not p: return p
+    if p.startswith(("http://","https://","data:")): return p
+    root, ext = os.path.splitext(p)
+    if ext.lower() in (".png",".jpg",".jpeg"): return p
+    if ext == "": return root + ".png"
+    return p
+
+# ------------------ Excel ------------------
+def _parsear_equipos(ruta: str) -> tuple:
+    """equipos.xlsx -> (nombres, colores, imagenes) tal cual vienen en la hoja."""
+    import pandas as pd
+    df = pd.read_excel(ruta, sheet_name="equipos")
+    lowered = {c.lower(): c for c in df.columns}
+
+    def columna(serie) -> list:
+        return ["" if pd.isna(v) else str(v).strip() for v in serie]
+
+    col_equipo = lowered.get("equipo", df.columns[0])
+    names = columna(df[col_equipo])
+
+    if "color" in lowered:
+        colors_raw = columna(df[lowered["color"]])
+    elif df.shape[1] >= 2:
+        colors_raw = columna(df.iloc[:, 1])
+    else:
+        colors_raw = [""] * len(names)
+
+    if "imagen" in lowered:
+        imgs_raw = columna(df[lowered["imagen"]])
+    elif df.shape[1] >= 3:
+        imgs_raw = columna(df.iloc[:, 2])
+    else:
+        imgs_raw = [""] * len(names)
+    return names, colors_raw, imgs_raw
+
+def leer_equipos():
+    """Lee 'equipos' -> (nombres, colores, imagenes)"""
+    try:
+        names, colors_raw, imgs_raw = cargar_libro(EXCEL_PATH, EQUIPOS_CACHE, _parsear_equipos)
+
+        colors, images = {}, {}
+        base_dir_xlsx = os.path.dirname(EXCEL_PATH)
+        html_dir = os.path.dirname(OUTPUT_HTML)
+        for idx, (n, c, img) in enumerate(zip(names, colors_raw, imgs_raw)):
+            c_norm = _normalize_hex_color(c) if isinstance(c, str) else ""
+            if not c_norm:
+                c_norm = "#D32F2F" if idx == 0 else "#1976D2"
+            colors[n] = c_norm
+
+            img = _fix_ext((img or "").strip())
+            if img and not img.lower().startswith(("http://","https://","data:")):
+                abs_img = os.path.normpath(os.path.join(base_dir_xlsx, img))
+                if os.path.exists(abs_img):
+                    rel = os.path.relpath(abs_img, html_dir).replace('\\','/')
+                    images[n] = rel
+                else:
+                    images[n] = ""
+            else:
+                images[n] = img
+        return names, colors, images
+    except Exception:
+        return ["Equipo A", "Equipo B"], {"Equipo A": "#D32F2F", "Equipo B": "#1976D2"}, {"Equipo A": "", "Equipo B": ""}
+
+# Jugadores: índice en memoria + caché binaria (se recarga si cambia el xlsx)
+_plantel = None
+
+def obtener_plantel() -> Plantel:
+    global _plantel
+    if _plantel is None:
+        _plantel = Plantel(JUGADORES_PATH, JUGADORES_CACHE)
+        _plantel.cargar_en_fondo()
+    return _plantel
+
+def leer_jugadores(sheet):
+    try:
+        return obtener_plantel().jugadores(sheet)
+    except Exception:
+        return []
@@ -15,33 +15,47 @@ TIPOS_FONDOS = [
 
 ELEMENTOS = ["equipo_local","marcador_local","equipo_visita","marcador_visita","reloj"]
 
-# Cargar o inicializar config
-if os.path.exists(CONFIG_PATH):
-    with open(CONFIG_PATH,"r",encoding="utf-8") as f:
-        config = json.load(f)
-else:
-    config = {}
-
-# Inicializar posiciones y tamaños si no existen
-for tipo in TIPOS_FONDOS:
-    if "posiciones" not in config:
-        config["posiciones"] = {}
-    if tipo not in config["posiciones"]:
-        config["posiciones"][tipo] = {}
-    for elem in ELEMENTOS:
-        if elem not in config["posiciones"][tipo]:
-            defaults_pos = {
-                "equipo_local": {"top":80,"left":90,"size":36,"font":"Arial"},
-                "marcador_local": {"top":35,"left":190,"size":96,"font":"Arial"},
-                "equipo_visita": {"top":80,"left":310,"size":36,"font":"Arial"},
-                "marcador_visita": {"top":35,"left":300,"size":96,"font":"Arial"},
-                "reloj": {"top":110,"left":250,"size":32,"font":"Arial"}
-            }
-            config["posiciones"][tipo][elem] = defaults_pos[elem]
+def cargar_config_archivo():
+    # Cargar o inicializar config
+    if os.path.exists(CONFIG_PATH):
+        with open(CONFIG_PATH,"r",encoding="utf-8") as f:
+            return json.load(f)
+    return {}
+
+def completar_posiciones(config):
+    # Inicializar posiciones y tamaños si no existen
+    for tipo in TIPOS_FONDOS:
+        if "posiciones" not in config:
+            config["posiciones"] = {}
+        if tipo not in config["posiciones"]:
+            config["posiciones"][tipo] = {}
+        for elem in ELEMENTOS:
+            if elem not in config["posiciones"][tipo]:
+                defaults_pos = {
+                    "equipo_local": {"top":80,"left":90,"size":36,"font":"Arial"},
+                    "marcador_local": {"top":35,"left":190,"size":96,"font":"Arial"},
+                    "equipo_visita": {"top":80,"left":310,"size":36,"font":"Arial"},
+                    "marcador_visita": {"top":35,"left":300,"size":96,"font":"Arial"},
+                    "reloj": {"top":110,"left":250,"size":32,"font":"Arial"}
+                }
+                config["posiciones"][tipo][elem] = defaults_pos[elem]
+    return config
+
+def guardar_config_archivo(config):
+    with open(CONFIG_PATH,"w",encoding="utf-8") as f:
+        json.dump(config,f,indent=2)
 
 class Configuracion(QWidget):
-    def __init__(self):
+    """
+    Editor de posiciones. Recibe el config en memoria (compartido con el
+    Marcador cuando ambos viven en el launcher), una función `guardar(config)`
+    y un aviso `al_guardar()` para refrescar el overlay en vivo.
+    """
+    def __init__(self, config=None, guardar=None, al_guardar=None):
         super().__init__()
+        self.config = completar_posiciones(config if config is not None else cargar_config_archivo())
+        self._guardar = guardar or guardar_config_archivo
+        self._al_guardar = al_guardar
         self.setWindowTitle("Configuración Marcador Completo")
         self.setGeometry(100,100,700,500)
 
@@ -93,7 +107,7 @@ class Configuracion(QWidget):
     def cambiar_tipo(self, tipo):
         self.tipo_actual = tipo
         for elem in ELEMENTOS:
-            cfg = config["posiciones"][tipo][elem]
+            cfg = self.config["posiciones"][tipo][elem]
             self.spinboxes[elem]["top"].setValue(cfg["top"])
             self.spinboxes[elem]["left"].setValue(cfg["left"])
             self.spinboxes[elem]["size"].setValue(cfg.get("size",36))
@@ -102,13 +116,14 @@ class Configuracion(QWidget):
 
     def guardar(self):
         for elem in ELEMENTOS:
-            cfg = config["posiciones"][self.tipo_actual][elem]
+            cfg = self.config["posiciones"][self.tipo_actual][elem]
             cfg["top"] = self.spinboxes[elem]["top"].value()
             cfg["left"] = self.spinboxes[elem]["left"].value()
             cfg["size"] = self.spinboxes[elem]["size"].value()
             cfg["font"] = self.spinboxes[elem]["font"].currentFont().family()
-        with open(CONFIG_PATH,"w",encoding="utf-8") as f:
-            json.dump(config,f,indent=2)
+        self._guardar(self.config)
+        if self._al_guardar:
+            self._al_guardar()
         self.close()  # Cierra la ventana y vuelve al launcher
 
 if __name__=="__main__":
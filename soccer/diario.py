@@ -0,0 +1,147 @@
+"""
+Diario de la transmisión (marcador.log): una línea JSON por registro con
+los eventos de cada partido, los tiempos de render, los accesos HTTP y
+los errores.
+
+Quien registra sólo arma el registro y lo deja en una cola; un hilo
+aparte (QueueListener) lo escribe y rota el archivo por tamaño, así que
+el hilo de Qt nunca toca disco. Los registros de detalle (render, HTTP)
+se piden detrás de `habilitado(DEBUG)`: con el nivel apagado no se arma
+nada. Los avisos y errores salen además por consola, como antes con print().
+
+Config (config.json):
+  "log_nivel":  "debug" | "info" (por defecto) | "error" | "off"
+  "log_max_kb": tamaño antes de rotar (2048)   "log_copias": copias (3)
+
+Exportar un partido para analizarlo después del show:
+  python diario.py <id_partido> [destino.jsonl]
+"""
+import os
+import sys
+import glob
+import json
+import queue
+import atexit
+import logging
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+
+LOG_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "marcador.log")
+DEBUG, INFO, AVISO, ERROR = logging.DEBUG, logging.INFO, logging.WARNING, logging.ERROR
+NIVELES = {"debug": DEBUG, "info": INFO, "error": ERROR, "off": None}
+
+_log = logging.getLogger("marcador")
+_log.propagate = False
+# Sin configurar(): sólo errores, por el handler de último recurso (stderr)
+_log.setLevel(logging.WARNING)
+_oyente = None
+
+# `if habilitado(DEBUG): ...` antes de armar un registro caro (isEnabledFor cachea el nivel)
+habilitado = _log.isEnabledFor
+
+class _FormatoJSON(logging.Formatter):
+    def format(self, record) -> str:
+        linea = {"t": int(record.created * 1000), "nivel": record.levelname.lower(),
+                 "tipo": getattr(record, "tipo", "log"), "msg": record.getMessage()}
+        linea.update(getattr(record, "datos", {}))
+        return json.dumps(linea, ensure_ascii=False, default=str)
+
+# ------------------ Configuración ------------------
+def configurar(config: dict = None, ruta: str = LOG_PATH):
+    """Arranca (o reinicia) el hilo del diario según config.json."""
+    config = config or {}
+    detener()
+    nivel = NIVELES.get(str(config.get("log_nivel", "info")).lower(), INFO)
+    handlers = []
+    if nivel is not None:
+        archivo = RotatingFileHandler(ruta, maxBytes=int(config.get("log_max_kb", 2048)) * 1024,
+                                      backupCount=int(config.get("log_copias", 3)), encoding="utf-8", delay=True)
+        archivo.setFormatter(_FormatoJSON())
+        archivo.setLevel(nivel)
+        handlers.append(archivo)
+    consola = logging.StreamHandler(sys.stderr)
+    consola.setLevel(logging.WARNING)
+    handlers.append(consola)
+
+    global _oyente
+    cola = queue.SimpleQueue()
+    _log.handlers = [QueueHandler(cola)]
+    _log.setLevel(min(nivel if nivel is not None else ERROR, logging.WARNING))
+    _oyente = QueueListener(cola, *handlers, respect_handler_level=True)
+    _oyente.start()
+
+def activo() -> bool:
+    return _oyente is not None
+
+def detener():
+    """Vacía la cola y cierra el archivo (también al salir del proceso)."""
+    global _oyente
+    if _oyente is None:
+        return
+    _oyente.stop()
+    for h in _oyente.handlers:
+        h.close()
+    _oyente = None
+    _log.handlers = []
+
+atexit.register(detener)
+
+# ------------------ Registros ------------------
+def _registrar(nivel: int, tipo: str, msg: str, datos: dict):
+    _log.log(nivel, msg, extra={"tipo": tipo, "datos": datos})
+
+def evento(partido: str, tipo: str, **datos):
+    """Transición de un partido (gol, tarjeta, reloj...), lo mismo que va a la bitácora."""
+    if habilitado(INFO):
+        _registrar(INFO, "evento", tipo, {"partido": partido, "evento": tipo, **datos})
+
+def render(partido: str, ms: float, **datos):
+    """Duración de un render; llamar sólo si habilitado(DEBUG)."""
+    _registrar(DEBUG, "render", f"{ms:.2f} ms", {"partido": partido, "ms": round(ms, 3), **datos})
+
+def acceso(metodo: str, ruta: str, estado, ms: float, cliente: str, partido: str = None):
+    """Una petición HTTP; llamar sólo si habilitado(DEBUG)."""
+    datos = {"metodo": metodo, "ruta": ruta, "estado": estado, "ms": round(ms, 3), "cliente": cliente}
+    if partido:
+        datos["partido"] = partido
+    _registrar(DEBUG, "acceso", f"{metodo} {ruta} {estado}", datos)
+
+def aviso(origen: str, msg: str, **datos):
+    """Algo degradado pero no roto (p. ej. falta una dependencia opcional); también por consola."""
+    _registrar(AVISO, "aviso", f"[{origen}] {msg}", {"origen": origen, **datos})
+
+def error(origen: str, e, partido: str = None, **datos):
+    """Error recuperado; también sale por consola como "[origen] detalle"."""
+    if partido:
+        datos["partido"] = partido
+    extra = "".join(f" {k}={v}" for k, v in datos.items())
+    _registrar(ERROR, "error", f"[{origen}] {e}{extra}", {"origen": origen, "error": repr(e), **datos})
+
+# ------------------ Exportar ------------------
+def _archivos(ruta: str) -> list:
+    """marcador.log.N ... marcador.log.1, marcador.log: del más viejo al más nuevo."""
+    rotados = [r for r in glob.glob(ruta + ".*") if r.rsplit(".", 1)[1].isdigit()]
+    rotados.sort(key=lambda r: int(r.rsplit(".", 1)[1]), reverse=True)
+    return rotados + ([ruta] if os.path.exists(ruta) else [])
+
+def exportar(id_partido: str, destino: str = None, ruta: str = LOG_PATH) -> tuple:
+    """Copia a `destino` (JSONL) los registros de un partido. Devuelve (destino, líneas)."""
+    destino = destino or f"{os.path.splitext(ruta)[0]}-{id_partido}.jsonl"
+    n = 0
+    with open(destino, "w", encoding="utf-8") as salida:
+        for archivo in _archivos(ruta):
+            with open(archivo, encoding="utf-8", errors="replace") as f:
+                for linea in f:
+                    try:
+                        registro = json.loads(linea)
+                    except ValueError:
+                        continue
+                    if isinstance(registro, dict) and registro.get("partido") == id_partido:
+                        salida.write(linea if linea.endswith("\n") else linea + "\n")
+                        n += 1
+    return destino, n
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        sys.exit("uso: python diario.py <id_partido> [destino.jsonl]")
+    destino, n = exportar(sys.argv[1], sys.argv[2] if len(sys.argv) > 2 else None)
+    print(f"{n} registros de {sys.argv[1]} -> {destino}")
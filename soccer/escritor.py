@@ -0,0 +1,129 @@
+import os
+import time
+import tempfile
+import threading
+
+import diario
+
+def escribir_atomico(ruta: str, datos: bytes, fsync: bool = False):
+    """
+    Escribe `datos` en un temporal del mismo directorio y lo renombra encima
+    de `ruta` con os.replace: quien lea el archivo ve la versión vieja o la
+    nueva completa, nunca una a medias.
+    """
+    carpeta = os.path.dirname(ruta) or "."
+    fd, tmp = tempfile.mkstemp(prefix=".tmp-", suffix=os.path.basename(ruta), dir=carpeta)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(datos)
+            if fsync:
+                f.flush()
+                os.fsync(f.fileno())
+        for intento in range(3):
+            try:
+                os.replace(tmp, ruta)
+                return
+            except PermissionError:
+                # Windows: el navegador puede tener el destino abierto un instante
+                if intento == 2:
+                    raise
+                time.sleep(0.01)
+    except BaseException:
+        try: os.unlink(tmp)
+        except OSError: pass
+        raise
+
+class EscritorSalida:
+    """
+    Único punto de escritura de salida.html / estado.json.
+
+    - escribir() sólo encola; varias llamadas dentro del mismo frame se
+      juntan en una sola escritura por archivo.
+    - vaciar() escribe de forma atómica y se salta el archivo si los bytes
+      son idénticos a los últimos escritos. Si una escritura falla, los
+      datos siguen pendientes y se reintenta en el próximo frame.
+
+    `programar(fn)` decide cuándo se llama a vaciar() (p. ej. un QTimer de
+    un frame); sin él se escribe en el momento. Con `metricas`
+    (metricas.Metricas) se mide cada escritura real.
+    """
+    def __init__(self, programar=None, metricas=None):
+        self._lock = threading.Lock()
+        self._io = threading.Lock()  # vaciar(): escrituras, _ultimos y contadores
+        self._programar = programar
+        self._programado = False
+        self._pendientes = {}
+        self._ultimos = {}
+        self._fallidas = set()  # rutas cuyo último intento falló (se avisa una vez)
+        self._metricas = metricas
+        self.escrituras = 0
+        self.coalescidas = 0
+        self.identicas = 0
+        self.bytes = 0
+
+    @property
+    def omitidas(self) -> int:
+        return self.coalescidas + self.identicas
+
+    def escribir(self, ruta: str, datos):
+        if isinstance(datos, str):
+            datos = datos.encode("utf-8")
+        with self._lock:
+            if ruta in self._pendientes:
+                self.coalescidas += 1
+            self._pendientes[ruta] = datos
+            if self._programado:
+                return
+            self._programado = self._programar is not None
+        if self._programar is None:
+            self.vaciar()
+        else:
+            self._programar(self.vaciar)
+
+    def vaciar(self):
+        """Escribe lo pendiente (desde cualquier hilo; dos vaciar() a la vez se esperan)."""
+        # _io: un vaciar() no toma lo nuevo mientras otro sigue escribiendo lo
+        # anterior (si no, la versión vieja podría renombrarse encima de la nueva)
+        with self._io:
+            with self._lock:
+                pendientes, self._pendientes = self._pendientes, {}
+                self._programado = False
+            reintentar = {}
+            for ruta, datos in pendientes.items():
+                if self._ultimos.get(ruta) == datos:
+                    self.identicas += 1
+                    continue
+                t0 = time.perf_counter_ns()
+                try:
+                    escribir_atomico(ruta, datos)
+                except OSError as e:
+                    if ruta not in self._fallidas:
+                        self._fallidas.add(ruta)
+                        diario.error("escritor", e, ruta=ruta)
+                    if self._metricas is not None:
+                        self._metricas.contar("escritura_errores")
+                    reintentar[ruta] = datos
+                    continue
+                self._fallidas.discard(ruta)
+                self._ultimos[ruta] = datos
+                self.escrituras += 1
+                self.bytes += len(datos)
+                if self._metricas is not None:
+                    self._metricas.registrar("escritura", time.perf_counter_ns() - t0)
+                    self._metricas.contar("bytes_escritos", len(datos))
+            if reintentar:
+                self._reintentar(reintentar)
+
+    def _reintentar(self, fallidas: dict):
+        """Devuelve a pendientes lo que no se pudo escribir (salvo que ya haya algo más nuevo)."""
+        with self._lock:
+            for ruta, datos in fallidas.items():
+                self._pendientes.setdefault(ruta, datos)
+            if self._programado or self._programar is None:
+                return  # sin programar(): sale con el próximo escribir()/vaciar()
+            self._programado = True
+        self._programar(self.vaciar)
+
+    def stats(self) -> dict:
+        return {"escrituras": self.escrituras, "omitidas": self.omitidas,
+                "coalescidas": self.coalescidas, "identicas": self.identicas, "bytes": self.bytes}
@@ -0,0 +1,49 @@
+from PyQt6.QtWidgets import QLabel
+from PyQt6.QtCore import QTimer
+
+from metricas import PRESUPUESTO_MS
+
+class HudRendimiento(QLabel):
+    """
+    Panel de rendimiento para el operador (F3 o "hud": true en config.json):
+    tiempos del render contra el presupuesto de un frame, escrituras y
+    tráfico del servidor. Lee motor.metricas() una vez por segundo y sólo
+    mientras está visible.
+    """
+    def __init__(self, motor, parent=None):
+        super().__init__(parent)
+        self.motor = motor
+        self.setStyleSheet("padding:4px 8px; background:#111; color:#9f9; font-family:monospace; font-size:11px;")
+        self._timer = QTimer(self); self._timer.timeout.connect(self.actualizar)
+        self.setVisible(False)
+
+    def alternar(self):
+        self.setVisible(not self.isVisible())
+
+    def setVisible(self, visible: bool):
+        super().setVisible(visible)
+        if visible:
+            self.actualizar()
+            self._timer.start(1000)
+        else:
+            self._timer.stop()
+
+    def actualizar(self):
+        m = self.motor.metricas()
+        etapas, c = m["etapas"], m["contadores"]
+        r = etapas.get("render", {})
+        lineas = [
+            f"render  p50 {r.get('p50_ms', 0):6.2f}  p99 {r.get('p99_ms', 0):6.2f}  max {r.get('max_ms', 0):6.2f} ms"
+            f"  (>{PRESUPUESTO_MS:.1f} ms: {r.get('sobre_presupuesto', 0)})",
+            "  ".join(f"{k} {v['p99_ms']:.2f}" for k, v in etapas.items() if k != "render") + "  (p99 ms)",
+            f"renders {c.get('renders', 0)}  sin cambio {c.get('renders_sin_cambio', 0)}  html {c.get('html_reescrito', 0)}"
+            f"  errores {c.get('render_errores', 0)}  ticks {c.get('ticks_ui', 0)}",
+            f"escrituras {sum(p['escritor']['escrituras'] for p in m['partidos'].values())}"
+            f"  omitidas {sum(p['escritor']['omitidas'] for p in m['partidos'].values())}"
+            f"  {c.get('bytes_escritos', 0) / 1024:.0f} KB"
+            f"  http GET {c.get('http_get', 0)} POST {c.get('http_post', 0)}"
+            f"  SSE {sum(p['clientes_sse'] for p in m['partidos'].values())}",
+        ]
+        if "ultimo_error" in m["valores"]:
+            lineas.append(f"último error: {m['valores']['ultimo_error']}")
+        self.setText("\n".join(lineas))
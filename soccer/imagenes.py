@@ -0,0 +1,101 @@
+"""
+Variantes de imagen al tamaño en que se muestran (escudos, marca, stats,
+fondos), en WebP si Pillow lo soporta o PNG optimizado si no. Se guardan en
+cache/imagenes/<hash de la fuente>-<ancho>x<alto>.<ext>, así que sólo se
+generan una vez por archivo y escala. Pillow es opcional: sin él se sirven
+los originales.
+
+Uso (pre-generar todo):  python imagenes.py [--bug-scale 1.5]
+"""
+import io
+import os
+
+from comun import CACHE_DIR, escala_bug
+from escritor import escribir_atomico
+import diario
+
+IMAGENES_DIR = os.path.join(CACHE_DIR, 'imagenes')
+# Caja en pantalla (px CSS, antes de --bug-scale) de cada tipo de activo
+TAMANOS = {
+    "escudo": (180, 180),  # .crest
+    "marca": (280, 96),    # .ea-tri img
+    "stats": (200, 200),   # .stats-icon
+    "fondo": (1920, 1080), # lienzo completo
+}
+# Los que viven dentro de #bug-wrap y se escalan con --bug-scale
+ESCALABLES = ("escudo", "marca", "stats")
+
+_pil = None  # (Image, soporta_webp), o False si Pillow no está
+
+def _pillow():
+    global _pil
+    if _pil is None:
+        try:
+            from PIL import Image, features
+            _pil = (Image, features.check("webp"))
+        except ImportError:
+            diario.aviso("imagenes", "Pillow no está instalado: se sirven los originales")
+            _pil = False
+    return _pil
+
+class Optimizador:
+    def __init__(self, escala: float = 1.0, carpeta: str = IMAGENES_DIR):
+        self.escala = escala
+        self.carpeta = carpeta
+        self.generadas = 0
+
+    def tamano(self, tipo: str) -> tuple:
+        w, h = TAMANOS[tipo]
+        if tipo in ESCALABLES:
+            w, h = round(w * self.escala), round(h * self.escala)
+        return w, h
+
+    def variante(self, ruta: str, huella: str, tipo: str):
+        """Ruta de la variante de `ruta` para `tipo`, o None si conviene el original."""
+        if tipo not in TAMANOS:
+            return None
+        w, h = self.tamano(tipo)
+        base = os.path.join(self.carpeta, f"{huella}-{w}x{h}")
+        for ext in (".webp", ".png"):
+            if os.path.exists(base + ext):
+                return base + ext  # ya generada (clave = hash de la fuente)
+        pil = _pillow()
+        if not pil:
+            return None
+        Image, webp = pil
+        try:
+            with Image.open(ruta) as im:
+                if im.width <= w and im.height <= h and not webp:
+                    return None  # ya es del tamaño justo y no hay formato mejor
+                im = im.convert("RGBA" if "A" in im.getbands() or "transparency" in im.info else "RGB")
+                im.thumbnail((w, h), Image.LANCZOS)
+                buf = io.BytesIO()
+                if webp:
+                    im.save(buf, "WEBP", quality=90, method=4)
+                    destino = base + ".webp"
+                else:
+                    im.save(buf, "PNG", optimize=True)
+                    destino = base + ".png"
+            os.makedirs(self.carpeta, exist_ok=True)
+            escribir_atomico(destino, buf.getvalue())
+        except Exception as e:
+            diario.error("imagenes", e, ruta=ruta)
+            return None
+        self.generadas += 1
+        return destino
+
+# ------------------ Pre-generar ------------------
+if __name__ == "__main__":
+    from comun import obtener_config, leer_equipos
+    from activos import Manifiesto
+
+    config = obtener_config()
+    _, _, imagenes = leer_equipos()
+    opt = Optimizador(escala_bug(config))
+    manifiesto = Manifiesto(optimizador=opt).construir(imagenes, config)
+    antes = despues = 0
+    for origen, url in manifiesto.variantes():
+        antes += os.path.getsize(origen)
+        despues += os.path.getsize(url) if url else os.path.getsize(origen)
+    print(f"escala {opt.escala:.2f}: {len(manifiesto.urls())} activos, {opt.generadas} variantes nuevas, "
+          f"{antes / 1024:.0f} KB -> {despues / 1024:.0f} KB")
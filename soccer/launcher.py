@@ -1,15 +1,24 @@
 import sys
 import os
+import importlib
 from PyQt6.QtWidgets import QApplication, QWidget, QVBoxLayout, QPushButton
+from PyQt6.QtCore import QTimer
 
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 
 class Launcher(QWidget):
+    """
+    Aloja Configuracion y Marcador en el mismo QApplication: las ventanas se
+    crean una vez y se reutilizan, y ambas comparten el config en memoria.
+    """
     def __init__(self):
         super().__init__()
         self.setWindowTitle("Marcador Soccer - Launcher")
         self.setGeometry(200, 200, 300, 150)
 
+        self.ventana_config = None
+        self.marcador = None
+
         layout = QVBoxLayout()
 
         btn_config = QPushButton("Configurar")
@@ -22,14 +31,46 @@ class Launcher(QWidget):
 
         self.setLayout(layout)
 
+        # Precarga de los módulos cuando el launcher ya está en pantalla
+        QTimer.singleShot(0, self._precargar)
+
+    def _precargar(self):
+        for modulo in ("app", "configuracion"):
+            importlib.import_module(modulo)
+
+    def _mostrar(self, ventana):
+        ventana.show()
+        ventana.raise_()
+        ventana.activateWindow()
+
     def abrir_config(self):
-        os.system(f"{sys.executable} {os.path.join(BASE_DIR,'configuracion.py')}")
+        import app
+        from configuracion import Configuracion
+        if self.ventana_config is None:
+            self.ventana_config = Configuracion(
+                config=app.obtener_config(),
+                guardar=app.guardar_config,
+                al_guardar=self._config_guardada
+            )
+        else:
+            # refrescar los controles con el config vivo
+            self.ventana_config.cambiar_tipo(self.ventana_config.tipo_actual)
+        self._mostrar(self.ventana_config)
 
     def abrir_transmision(self):
-        os.system(f"{sys.executable} {os.path.join(BASE_DIR,'app.py')}")
+        import app
+        if self.marcador is None or getattr(self.marcador, "cerrado", False):
+            self.marcador = app.Marcador()
+        self._mostrar(self.marcador)
+
+    def _config_guardada(self):
+        # Re-render del marcador abierto con el config guardado (colores, escala, logos)
+        if self.marcador is not None and not getattr(self.marcador, "cerrado", False):
+            self.marcador.aplicar_config()
+            self._mostrar(self.marcador)
 
 if __name__=="__main__":
     app = QApplication(sys.argv)
     ventana = Launcher()
     ventana.show()
-    sys.exit(app.exec())
\ No newline at end of file
+    sys.exit(app.exec())
@@ -0,0 +1,92 @@
+"""
+Métricas del proceso: tiempos por etapa del render (estado, activos,
+plantilla, serializar, publicar, escritura) y contadores (renders,
+escrituras omitidas, peticiones HTTP...). Las sirve /metrics y las
+muestra el HUD del operador (hud.py).
+"""
+import time
+import threading
+from collections import deque
+from contextlib import contextmanager
+
+# Presupuesto de un frame a 60 fps: un render que lo pasa se cuenta aparte
+PRESUPUESTO_MS = 1000 / 60
+
+class _Etapa:
+    __slots__ = ("n", "total_ns", "max_ns", "ultimo_ns", "sobre_presupuesto", "muestras")
+
+    def __init__(self, muestras: int):
+        self.n = 0
+        self.total_ns = 0
+        self.max_ns = 0
+        self.ultimo_ns = 0
+        self.sobre_presupuesto = 0
+        self.muestras = deque(maxlen=muestras)  # últimas N, para p50/p99
+
+    def resumen(self) -> dict:
+        orden = sorted(self.muestras)
+        pct = lambda q: orden[min(len(orden) - 1, int(len(orden) * q))] / 1e6 if orden else 0.0
+        return {
+            "n": self.n, "media_ms": round(self.total_ns / self.n / 1e6, 3) if self.n else 0.0,
+            "p50_ms": round(pct(0.50), 3), "p99_ms": round(pct(0.99), 3),
+            "max_ms": round(self.max_ns / 1e6, 3), "ultimo_ms": round(self.ultimo_ns / 1e6, 3),
+            "total_ms": round(self.total_ns / 1e6, 1), "sobre_presupuesto": self.sobre_presupuesto,
+        }
+
+class Metricas:
+    def __init__(self, muestras: int = 1024):
+        self._lock = threading.Lock()
+        self._muestras = muestras
+        self._etapas = {}
+        self._contadores = {}
+        self._valores = {}
+        self._inicio = time.monotonic()
+
+    def registrar(self, etapa: str, ns: int):
+        with self._lock:
+            e = self._etapas.get(etapa)
+            if e is None:
+                e = self._etapas[etapa] = _Etapa(self._muestras)
+            e.n += 1
+            e.total_ns += ns
+            e.ultimo_ns = ns
+            e.muestras.append(ns)
+            if ns > e.max_ns:
+                e.max_ns = ns
+            if ns > PRESUPUESTO_MS * 1e6:
+                e.sobre_presupuesto += 1
+
+    @contextmanager
+    def medir(self, etapa: str):
+        t0 = time.perf_counter_ns()
+        try:
+            yield
+        finally:
+            self.registrar(etapa, time.perf_counter_ns() - t0)
+
+    def contar(self, nombre: str, n: int = 1):
+        with self._lock:
+            self._contadores[nombre] = self._contadores.get(nombre, 0) + n
+
+    def fijar(self, nombre: str, valor):
+        """Último valor de algo que no es un contador (p. ej. el último error)."""
+        with self._lock:
+            self._valores[nombre] = valor
+
+    def foto(self) -> dict:
+        with self._lock:
+            return {
+                "uptime_s": round(time.monotonic() - self._inicio, 1),
+                "presupuesto_ms": round(PRESUPUESTO_MS, 2),
+                "etapas": {k: e.resumen() for k, e in self._etapas.items()},
+                "contadores": dict(self._contadores),
+                "valores": dict(self._valores),
+            }
+
+    def reiniciar(self):
+        with self._lock:
+            self._etapas.clear(); self._contadores.clear(); self._valores.clear()
+            self._inicio = time.monotonic()
+
+# Métricas del proceso (todos los partidos y el servidor)
+METRICAS = Metricas()
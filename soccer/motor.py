@@ -0,0 +1,792 @@
+import os
+import json
+import time
+import threading
+
+from servidor import Difusor, Registro, iniciar_servidor, detener_servidor
+from plantilla import PLANTILLA
+from escritor import EscritorSalida
+from bitacora import Bitacora
+from comandos import Comandos
+from agenda import Agenda
+from activos import Manifiesto
+from imagenes import Optimizador
+from reloj import RELOJ
+from metricas import METRICAS
+import diario
+from comun import (
+    BASE_DIR, OUTPUT_HTML, OUTPUT_STATE, BITACORA_DIR, MATCH_DIR, FONDOS,
+    _contrast_text, rel_from_html, _fix_ext, escala_bug
+)
+
+# ------------------ Render ------------------
+# Grupos de campos que puede marcar como "sucios" Partido.render()
+CAMPOS_RENDER = ("reloj", "marcador", "equipos", "overlay", "rojas", "extra", "flash")
+# Grupos que sólo viajan en el estado JSON (no obligan a reescribir salida.html)
+CAMPOS_SOLO_ESTADO = {"reloj", "flash", "overlay"}
+
+PARTIDO_PRINCIPAL = "principal"
+# Claves del config que son del partido (los partidos extra no las heredan)
+CLAVES_PARTIDO = ("marcador_local", "marcador_visita", "running", "start_epoch_ms", "elapsed_ms")
+
+def _programar_frame(fn):
+    """Vacía el escritor un frame (~16 ms) después, desde un hilo aparte."""
+    t = threading.Timer(0.016, fn)
+    t.daemon = True
+    t.start()
+
+# ------------------ Partido ------------------
+class Partido:
+    """
+    Estado y render de un partido, sin Qt.
+
+    Cada transición (gol, tarjeta, reloj...) toma `lock`, deja el estado
+    consistente, la anota en la bitácora y renderiza sólo lo que cambió.
+    Se puede usar desde cualquier hilo; los oyentes de suscribir() se
+    llaman fuera del lock con los grupos que cambiaron.
+    """
+    def __init__(self, id_partido: str, config: dict, team_colors: dict, team_images: dict,
+                 principal: bool = False, al_cambiar_vencimientos=None, manifiesto: Manifiesto = None,
+                 reloj=None):
+        self.id = id_partido
+        self.principal = principal
+        self.config = config
+        self.team_colors = team_colors
+        self.team_images = team_images
+        self.lock = threading.RLock()
+        # Base de tiempo monótona (reloj.RelojFalso en simulaciones)
+        self.reloj = reloj or RELOJ
+        self._oyentes = []
+        self._al_cambiar_vencimientos = al_cambiar_vencimientos
+        # URLs versionadas de logos/fondos (compartido entre partidos)
+        self.manifiesto = manifiesto or Manifiesto(optimizador=Optimizador()).construir(team_images, config)
+
+        if principal:
+            self.ruta_html, self.ruta_estado = OUTPUT_HTML, OUTPUT_STATE
+            carpeta_bitacora = BITACORA_DIR
+        else:
+            carpeta = os.path.join(MATCH_DIR, id_partido)
+            os.makedirs(carpeta, exist_ok=True)
+            self.ruta_html = os.path.join(carpeta, "salida.html")
+            self.ruta_estado = os.path.join(carpeta, "estado.json")
+            carpeta_bitacora = os.path.join(BITACORA_DIR, id_partido)
+
+        # ---- Marcador y equipos ----
+        self.equipo_local = config.get("equipo_local", "Equipo A")
+        self.equipo_visita = config.get("equipo_visita", "Equipo B")
+        self.marcador_local = int(config.get("marcador_local", 0))
+        self.marcador_visita = int(config.get("marcador_visita", 0))
+        self.red_local = 0
+        self.red_visita = 0
+
+        # ---- Reloj persistente ----
+        self.running = bool(config.get("running", False))
+        self.start_epoch_ms = int(config.get("start_epoch_ms", 0))
+        self.elapsed_ms = int(config.get("elapsed_ms", 0))
+        self.periodo = 1
+        self.base_minutos = 0  # 0 en 1T, 45 en 2T
+        self.tiempo_anadido_min = 0
+        self.mostrar_extra = False
+
+        # ---- Overlays (cola con prioridad) y destello de tarjeta ----
+        self.agenda = Agenda()
+        self.flash = ""
+        self.flash_vence_ms = 0
+        self.tipo_fondo = "normal"
+
+        self.bitacora = Bitacora(carpeta_bitacora)
+        self._recuperar_bitacora(self.bitacora.recuperar())
+
+        # Render incremental: piezas ya calculadas + último estado publicado
+        self.html_prev = ""
+        self._piezas = {}
+        self._state = {}
+        self.stats_png_rel = self._resolver_stats_png()
+        self.difusor = Difusor()
+        # Tiempos por etapa y contadores (/metrics, HUD)
+        self.metricas = METRICAS
+        # Escrituras atómicas, juntadas por frame y omitidas si no cambian
+        self.escritor = EscritorSalida(programar=_programar_frame, metricas=self.metricas)
+        self.ultimo_error = None
+
+    # ---------- Oyentes ----------
+    def suscribir(self, fn):
+        """fn(partido, campos) tras cada cambio; se llama desde el hilo que lo produjo."""
+        self._oyentes.append(fn)
+
+    def desuscribir(self, fn):
+        try: self._oyentes.remove(fn)
+        except ValueError: pass
+
+    def _cambio(self, *campos):
+        """Renderiza, avisa a los oyentes y al motor (llamar sin tener el lock)."""
+        self.render(*campos)
+        for fn in list(self._oyentes):
+            try:
+                fn(self, campos or CAMPOS_RENDER)
+            except Exception as e:
+                diario.error("partido", f"oyente: {e}", partido=self.id)
+        self._despertar()
+
+    def _despertar(self):
+        if self._al_cambiar_vencimientos is not None:
+            self._al_cambiar_vencimientos()
+
+    # ---------- Bitácora ----------
+    def _recuperar_bitacora(self, rec: dict):
+        if not self.bitacora.seq:
+            return  # bitácora vacía: manda el config
+        self.running = bool(rec["running"])
+        self.start_epoch_ms = int(rec["start_epoch_ms"])
+        self.elapsed_ms = int(rec["elapsed_ms"])
+        self.periodo = rec["periodo"]
+        self.base_minutos = 0 if self.periodo == 1 else 45
+        self.red_local, self.red_visita = rec["red_local"], rec["red_visita"]
+        self.tiempo_anadido_min = rec["tiempo_anadido_min"]
+        self.mostrar_extra = rec["mostrar_extra"]
+        self.marcador_local = rec["marcador_local"]
+        self.marcador_visita = rec["marcador_visita"]
+
+    def _anotar(self, tipo: str, **datos):
+        """Evento a la bitácora (para recuperar) y al diario (para analizar después)."""
+        self.bitacora.registrar(tipo, **datos)
+        diario.evento(self.id, tipo, **datos)
+
+    def _registrar_reloj(self):
+        self._anotar("reloj", running=self.running,
+                     start_epoch_ms=self.start_epoch_ms, elapsed_ms=self.elapsed_ms)
+
+    # ---------- Reloj ----------
+    def tiempo_total_ms(self, ahora_ms: int = None) -> int:
+        base_ms = self.base_minutos * 60 * 1000
+        live_ms = 0
+        if self.running and self.start_epoch_ms:
+            live_ms = max(0, (ahora_ms or self.reloj.ahora_ms()) - self.start_epoch_ms)
+        return base_ms + self.elapsed_ms + live_ms
+
+    def limite_ms(self) -> int:
+        """Fin del periodo: 45' o 90', más el tiempo añadido si se anunció."""
+        minutos = (45 if self.periodo == 1 else 90) + (self.tiempo_anadido_min if self.mostrar_extra else 0)
+        return minutos * 60 * 1000
+
+    def fin_periodo_ms(self):
+        """Instante exacto (base de self.reloj) en que el reloj corriendo llega al límite, o None."""
+        if not (self.running and self.start_epoch_ms):
+            return None
+        return self.start_epoch_ms + self.limite_ms() - self.base_minutos * 60 * 1000 - self.elapsed_ms
+
+    def reloj_txt(self) -> str:
+        m, s = divmod(self.tiempo_total_ms() // 1000, 60)
+        return f"{m:02}:{s:02}"
+
+    def _consolidar(self):
+        if self.running and self.start_epoch_ms:
+            self.elapsed_ms += max(0, self.reloj.ahora_ms() - self.start_epoch_ms)
+        self.start_epoch_ms = 0
+        self.running = False
+
+    def iniciar_reloj(self):
+        with self.lock:
+            if self.running:
+                return
+            self.start_epoch_ms = self.reloj.ahora_ms()
+            self.running = True
+            self._registrar_reloj()
+        self._cambio("reloj")
+
+    def pausar_reloj(self):
+        with self.lock:
+            if not self.running:
+                return
+            self._consolidar()
+            self._registrar_reloj()
+        self._cambio("reloj")
+
+    def toggle_reloj(self) -> bool:
+        if self.running:
+            self.pausar_reloj()
+        else:
+            self.iniciar_reloj()
+        return self.running
+
+    def tiempo_anadido(self, minutos: int):
+        with self.lock:
+            self.tiempo_anadido_min = int(minutos)
+            self.mostrar_extra = self.tiempo_anadido_min > 0
+            # no arrancamos el reloj aquí: se queda en el estado actual
+            self.running = False
+            self.start_epoch_ms = 0
+            self._anotar("extra", minutos=self.tiempo_anadido_min)
+        self._cambio("reloj", "extra")
+
+    def set_periodo(self, num: int):
+        with self.lock:
+            self.periodo = 1 if num != 2 else 2
+            self.base_minutos = 0 if self.periodo == 1 else 45
+            # Reiniciamos el conteo del tiempo jugado dentro del periodo
+            self.elapsed_ms = 0
+            self.start_epoch_ms = 0
+            self.mostrar_extra = False
+            self.flash = ""; self.flash_vence_ms = 0
+            self.running = False
+            self._anotar("periodo", periodo=self.periodo)
+        self._cambio("reloj", "extra", "flash")
+
+    def reset(self):
+        with self.lock:
+            self.running = False
+            self.periodo = 1
+            self.base_minutos = 0
+            self.elapsed_ms = 0
+            self.start_epoch_ms = 0
+            self.tiempo_anadido_min = 0
+            self.mostrar_extra = False
+            self.marcador_local = 0
+            self.marcador_visita = 0
+            self.red_local = 0
+            self.red_visita = 0
+            self.flash = ""; self.flash_vence_ms = 0
+            self.agenda.vaciar()
+            self.tipo_fondo = "normal"
+            # nuevo partido: se registra el reset y se compacta la bitácora
+            self._anotar("reset")
+            self.bitacora.snapshot()
+        self._cambio()
+
+    # ---------- Eventos del partido ----------
+    def set_equipos(self, local: str = None, visita: str = None):
+        with self.lock:
+            if local is not None: self.equipo_local = local
+            if visita is not None: self.equipo_visita = visita
+        self._cambio("equipos")
+
+    def gol(self, equipo: str):
+        with self.lock:
+            if equipo == "local":
+                self.marcador_local += 1
+            else:
+                self.marcador_visita += 1
+            self._anotar("gol", equipo=equipo, reloj=self.reloj_txt())
+        self._cambio("marcador")
+
+    def anotador(self, equipo: str, jugador: str, completar: bool = True):
+        """
+        Anotador del último gol de `equipo`; si su overlay sigue en pantalla o en cola, se completa.
+        Con completar=False sólo queda en la bitácora (el gol que lo trae ya armó su overlay).
+        """
+        with self.lock:
+            self._anotar("anotador", equipo=equipo, jugador=jugador)
+            if not completar:
+                return
+            en_pantalla = self.agenda.completar("goal", {"equipo": equipo}, {"jugador": jugador})[1]
+        if en_pantalla:
+            self._cambio("overlay")
+
+    def tarjeta(self, equipo: str, jugador: str, tipo: str, dur_ms: int = 5500):
+        with self.lock:
+            self.flash = "yellow" if tipo == "amarilla" else "red"
+            self.flash_vence_ms = self.reloj.ahora_ms() + 3000
+            if tipo == "roja":
+                if equipo == "local": self.red_local += 1
+                else: self.red_visita += 1
+            self._anotar("tarjeta", equipo=equipo, jugador=jugador, tipo_tarjeta=tipo, reloj=self.reloj_txt())
+            self._encolar("card", {"equipo": equipo, "jugador": jugador, "tipo": tipo}, "normal", dur_ms)
+        self._cambio("overlay", "rojas", "flash")
+
+    def cambio(self, equipo: str, sale: str, entra: str, dur_ms: int = 5500):
+        with self.lock:
+            self._anotar("cambio", equipo=equipo, sale=sale, entra=entra, reloj=self.reloj_txt())
+            cambio = self._encolar("sub", {"equipo": equipo, "sale": sale, "entra": entra}, "normal", dur_ms)[1]
+        if cambio:
+            self._cambio("overlay")
+        else:
+            self._despertar()
+
+    # ---------- Overlay ----------
+    def _encolar(self, tipo: str, data: dict, fondo_key: str, dur_ms: int, **opciones):
+        """Pasa el overlay a la agenda (con el lock tomado). Devuelve (id, cambió el de pantalla)."""
+        fondo_key = fondo_key if fondo_key in FONDOS else "normal"
+        id_item, cambio = self.agenda.agregar(tipo, data, fondo_key, dur_ms, self.reloj.ahora_ms(), **opciones)
+        self._sincronizar_fondo()
+        return id_item, cambio
+
+    def _sincronizar_fondo(self):
+        actual = self.agenda.actual
+        self.tipo_fondo = actual["fondo"] if actual else "normal"
+
+    def mostrar_overlay(self, tipo: str, data: dict, fondo_key: str = "stats", dur_ms: int = 6000,
+                        politica: str = None, prioridad: int = None, en_ms: int = 0, clave: str = None) -> int:
+        """
+        Agenda un overlay. `politica` (cola/interrumpir/fusionar, ver agenda.py)
+        y `prioridad` salen del tipo si no se dan; `en_ms` lo programa para
+        más tarde. Devuelve su id (para cancelar_overlay).
+        """
+        with self.lock:
+            id_item, cambio = self._encolar(tipo, data, fondo_key, dur_ms, politica=politica,
+                                            prioridad=prioridad, en_ms=en_ms, clave=clave)
+        if cambio:
+            self._cambio("overlay")
+        else:
+            self._despertar()  # puede haber un nuevo vencimiento
+        return id_item
+
+    def ocultar_overlay(self):
+        """Baja el overlay en pantalla; si hay otro en cola, sale ése."""
+        with self.lock:
+            cambio = self.agenda.ocultar(self.reloj.ahora_ms())
+            self._sincronizar_fondo()
+        if cambio:
+            self._cambio("overlay")
+
+    def cancelar_overlay(self, id_item: int) -> bool:
+        """Quita un overlay pendiente (o el que está en pantalla). False si no existe."""
+        with self.lock:
+            en_pantalla = self.agenda.actual is not None and self.agenda.actual["id"] == id_item
+            ok = self.agenda.cancelar(id_item, self.reloj.ahora_ms())
+            self._sincronizar_fondo()
+        if en_pantalla:
+            self._cambio("overlay")
+        elif ok:
+            self._despertar()
+        return ok
+
+    def overlays_pendientes(self) -> list:
+        with self.lock:
+            return self.agenda.pendientes(self.reloj.ahora_ms())
+
+    # ---------- Vencimientos ----------
+    def proximo_vencimiento_ms(self):
+        """Próximo instante (epoch ms) en que algo vence solo, o None."""
+        with self.lock:
+            ahora = self.reloj.ahora_ms()
+            candidatos = [t for t in (self.agenda.proximo_ms(ahora), self.flash_vence_ms) if t]
+            fin = self.fin_periodo_ms()
+            if fin is not None:
+                candidatos.append(max(ahora, fin))
+        return min(candidatos) if candidatos else None
+
+    def vencer(self, ahora_ms: int = None):
+        """Aplica lo que ya venció: overlays de la agenda, destello y fin de periodo (45'/90' + añadido)."""
+        ahora_ms = ahora_ms or self.reloj.ahora_ms()
+        campos = []
+        with self.lock:
+            if self.agenda.vencer(ahora_ms):
+                self._sincronizar_fondo()
+                campos.append("overlay")
+            if self.flash_vence_ms and ahora_ms >= self.flash_vence_ms:
+                self.flash = ""; self.flash_vence_ms = 0
+                campos.append("flash")
+            fin = self.fin_periodo_ms()
+            if fin is not None and ahora_ms >= fin:
+                # se para justo en el límite, aunque el motor despierte tarde
+                self._consolidar()
+                self.elapsed_ms = self.limite_ms() - self.base_minutos * 60 * 1000
+                self._registrar_reloj()
+                campos.append("reloj")
+        if campos:
+            self._cambio(*campos)
+
+    def consolidar_reloj(self):
+        """Pausa y anota el reloj (p. ej. al cerrar) para no perder tiempo corrido."""
+        with self.lock:
+            if self.running and self.start_epoch_ms:
+                self._consolidar()
+                self._registrar_reloj()
+
+    # ---------- Render HTML ----------
+    def aplicar_config(self):
+        """El config cambió (logos, marca, bug_scale): re-resuelve los activos y re-render completo."""
+        self.manifiesto.refrescar(self.config)
+        self.render()
+
+    def _background_url(self) -> str:
+        # resuelto una vez al armar el manifiesto
+        return self.manifiesto.fondo(self.tipo_fondo)
+
+    def _resolver_stats_png(self) -> str:
+        # Resolver imagen de stats (offline)
+        try:
+            cand1 = os.path.join(BASE_DIR, 'assets', 'stats.png')
+            cand2 = os.path.join(BASE_DIR, 'stats.png')
+            if os.path.exists(cand1):
+                return os.path.relpath(cand1, os.path.dirname(OUTPUT_HTML)).replace('\\','/')
+            elif os.path.exists(cand2):
+                return os.path.relpath(cand2, os.path.dirname(OUTPUT_HTML)).replace('\\','/')
+        except Exception:
+            pass
+        return 'stats.png'
+
+    def _calc_equipos(self):
+        """Colores, contraste, marca y escudos: sólo cambian con equipos/logos."""
+        p = self._piezas
+        p["team_l"] = self.equipo_local
+        p["team_r"] = self.equipo_visita
+        p["color_local"] = self.team_colors.get(p["team_l"], "#D32F2F")
+        p["color_visita"] = self.team_colors.get(p["team_r"], "#1976D2")
+        p["color_text_local"] = _contrast_text(p["color_local"])
+        p["color_text_visita"] = _contrast_text(p["color_visita"])
+
+        brand_png_rel = self.config.get("brand_logo","").strip()
+        if not brand_png_rel:
+            guess = os.path.join(BASE_DIR, 'assets', 'logo.png')
+            brand_png_rel = rel_from_html(guess)
+        p["brand"] = self.manifiesto.url(brand_png_rel, "marca")
+
+        img_local = _fix_ext(self.config.get("logo_local","").strip() or self.team_images.get(p["team_l"], ""))
+        img_visita = _fix_ext(self.config.get("logo_visita","").strip() or self.team_images.get(p["team_r"], ""))
+        if img_local and "://" not in img_local and not img_local.startswith(("data:",)):
+            if os.path.isabs(img_local): img_local = rel_from_html(img_local)
+        if img_visita and "://" not in img_visita and not img_visita.startswith(("data:",)):
+            if os.path.isabs(img_visita): img_visita = rel_from_html(img_visita)
+        img_local, img_visita = self.manifiesto.url(img_local, "escudo"), self.manifiesto.url(img_visita, "escudo")
+
+        p["crest_l"] = (f"<img class='crest' src='{img_local}' alt='' onerror=\"this.style.display='none'\"/>" if img_local else "")
+        p["crest_r"] = (f"<img class='crest' src='{img_visita}' alt='' onerror=\"this.style.display='none'\"/>" if img_visita else "")
+
+    def _overlay_estado(self):
+        """Overlay como datos ({type, ...campos}); la página lo arma con sus <template>."""
+        actual = self.agenda.actual
+        if actual is None:
+            return None
+        return {"type": actual["tipo"], **actual["data"]}
+
+    def _armar_html(self) -> str:
+        p = self._piezas
+        # Armado de chips rojas y extra
+        reds_l_html = "".join("<span class='rc'></span>" for _ in range(int(self.red_local)))
+        reds_r_html = "".join("<span class='rc'></span>" for _ in range(int(self.red_visita)))
+        extra_txt = f"+{int(self.tiempo_anadido_min)}'" if (self.mostrar_extra and self.tiempo_anadido_min>0) else ""
+        extra_class = " show" if extra_txt else ""
+
+        return PLANTILLA.render({
+            # Los partidos extra viven en TXT/match/<id>/: sus rutas relativas
+            # (logos, fondos) siguen resolviéndose contra /TXT/
+            "BASE_HREF": "" if self.principal else "<base href=\"/TXT/\">",
+            "RUTA_DATOS": "" if self.principal else f"/match/{self.id}/",
+            "PRELOAD": self.manifiesto.preload_html(),
+            "BUG_SCALE": f"{escala_bug(self.config):.2f}",
+            "COLOR_LOCAL": p["color_local"],
+            "COLOR_VISITA": p["color_visita"],
+            "COLOR_TEXT_LOCAL": p["color_text_local"],
+            "COLOR_TEXT_VISITA": p["color_text_visita"],
+            "BRAND": p["brand"] or "",
+            "STATSPNG": self.manifiesto.url(self.stats_png_rel, "stats") or "stats.png",
+            "RELOJ": self._state.get("clock") or self.reloj_txt(),
+            "EXTRA_TXT": extra_txt,
+            "EXTRA_CLASS": extra_class,
+            "CREST_MID_L": p["crest_l"],
+            "CREST_MID_R": p["crest_r"],
+            "REDS_L": reds_l_html,
+            "REDS_R": reds_r_html,
+            "TEAM_L": p["team_l"],
+            "TEAM_R": p["team_r"],
+            "SCORE_L": str(self.marcador_local),
+            "SCORE_R": str(self.marcador_visita),
+        })
+
+    def render(self, *campos):
+        """
+        Renderiza sólo lo que cambió. `campos` son grupos de CAMPOS_RENDER
+        ("reloj", "marcador", "equipos", ...); sin argumentos se recalcula todo.
+        "reloj" sólo se marca al iniciar/pausar/resetear/cambiar de periodo; el
+        conteo en vivo lo hace la página, así que ningún tick escribe nada.
+        """
+        if not diario.habilitado(diario.DEBUG):
+            self._render(campos)
+            return
+        t0 = time.perf_counter_ns()
+        publicado = self._render(campos)
+        diario.render(self.id, (time.perf_counter_ns() - t0) / 1e6,
+                      campos=list(campos) or "todos", publicado=publicado)
+
+    def _render(self, campos: tuple) -> bool:
+        """True si publicó un estado nuevo."""
+        m = self.metricas
+        with self.lock, m.medir("render"):
+            m.contar("renders")
+            try:
+                sucio = set(campos) if campos else set(CAMPOS_RENDER)
+                p = self._piezas
+                if "equipos" in sucio or not p:
+                    with m.medir("activos"):
+                        self._calc_equipos()
+
+                with m.medir("estado"):
+                    state = self._reunir_estado(sucio)
+
+                # -------- HTML: sólo si cambió algo estructural --------
+                # (logos, marca y --bug-scale viven sólo en el HTML: se comparan aparte del estado)
+                html = self.html_prev
+                if sucio - CAMPOS_SOLO_ESTADO:
+                    with m.medir("plantilla"):
+                        html = self._armar_html()
+                html_nuevo = html != self.html_prev
+
+                # Tick de reloj sin cambio visible: nada que escribir
+                if state == self._state and not html_nuevo:
+                    m.contar("renders_sin_cambio")
+                    return False
+
+                if html_nuevo:
+                    with m.medir("publicar"):
+                        self.difusor.publicar_html(html)
+                    self.escritor.escribir(self.ruta_html, html)
+                    self.html_prev = html
+                    m.contar("html_reescrito")
+
+                if state != self._state:
+                    self._state = state
+                    # Empujar el diff a las páginas conectadas antes de tocar disco
+                    with m.medir("publicar"):
+                        self.difusor.publicar(state)
+                    # Guardar estado JSON (por si lo quieres usar en otra herramienta)
+                    with m.medir("serializar"):
+                        datos = json.dumps(state, ensure_ascii=False)
+                    self.escritor.escribir(self.ruta_estado, datos)
+                self.ultimo_error = None
+                return True
+
+            except Exception as e:
+                diario.error("render", e, partido=self.id)
+                self.ultimo_error = e
+                m.contar("render_errores")
+                m.fijar("ultimo_error", f"{self.id}: {e!r}")
+                return False
+
+    def _reunir_estado(self, sucio: set) -> dict:
+        """Estado publicado con los grupos `sucio` recalculados."""
+        p = self._piezas
+        state = dict(self._state)
+        if "reloj" in sucio:
+            state.update({
+                "clock": self.reloj_txt(),
+                "running": bool(self.running), "start_epoch_ms": int(self.start_epoch_ms), "elapsed_ms": int(self.elapsed_ms),
+                "base_ms": int(self.base_minutos * 60 * 1000),
+                "limit_ms": self.limite_ms()
+            })
+        if "equipos" in sucio:
+            state.update({
+                "teamL": p["team_l"], "teamR": p["team_r"],
+                "colorL": p["color_local"], "colorR": p["color_visita"],
+                "colorTextL": p["color_text_local"], "colorTextR": p["color_text_visita"],
+            })
+        if "marcador" in sucio:
+            state.update({"scoreL": int(self.marcador_local), "scoreR": int(self.marcador_visita)})
+        if "extra" in sucio:
+            state["extra"] = int(self.tiempo_anadido_min) if (self.mostrar_extra and self.tiempo_anadido_min>0) else 0
+        if "overlay" in sucio:
+            state["overlay"] = self._overlay_estado()
+        if "rojas" in sucio:
+            state.update({"redL": int(self.red_local), "redR": int(self.red_visita)})
+        if "flash" in sucio:
+            state["flash"] = self.flash
+        return state
+
+    def foto(self):
+        """(versión, estado publicado) leídos juntos."""
+        with self.lock:
+            return self.difusor.version, dict(self._state)
+
+    def cerrar(self):
+        self.consolidar_reloj()
+        try: self.escritor.vaciar()
+        except Exception: pass
+        try: self.bitacora.cerrar()
+        except Exception: pass
+
+# ------------------ Motor ------------------
+class Motor:
+    """
+    Todos los partidos del proceso: un solo servidor HTTP (cada partido en
+    /match/<id>/...) y un solo hilo de vencimientos que duerme hasta el
+    próximo overlay/destello/fin de periodo de cualquiera de ellos.
+
+    Con un `reloj` propio (reloj.RelojFalso) no hay hilo: el tiempo sólo
+    pasa con avanzar(), que aplica cada vencimiento en su instante exacto.
+    """
+    def __init__(self, directorio: str = BASE_DIR, reloj=None):
+        self.directorio = directorio
+        self.reloj = reloj or RELOJ
+        self.registro = Registro()
+        self._partidos = {}
+        self._lock = threading.Lock()
+        self._cond = threading.Condition()
+        self._activo = True
+        self.httpd = None
+        self.http_port = None
+        self.comandos = Comandos(self)
+        self.manifiesto = Manifiesto(optimizador=Optimizador())
+        self._hilo = None
+        if reloj is None:
+            self._hilo = threading.Thread(target=self._bucle_vencimientos, name="motor-vencimientos", daemon=True)
+            self._hilo.start()
+
+    # ---------- Partidos ----------
+    def crear(self, id_partido: str, config: dict, team_colors: dict, team_images: dict,
+              principal: bool = False) -> Partido:
+        """Crea (o devuelve, si ya existe) el partido `id_partido`."""
+        with self._lock:
+            partido = self._partidos.get(id_partido)
+            if partido is not None:
+                return partido
+            if not principal:
+                # parten de una copia: no pisan el config.json del principal
+                config = {k: v for k, v in config.items() if k not in CLAVES_PARTIDO}
+            partido = Partido(id_partido, config, team_colors, team_images, principal=principal,
+                              al_cambiar_vencimientos=self.despertar,
+                              manifiesto=self.manifiesto.construir(team_images, config), reloj=self.reloj)
+            self._partidos[id_partido] = partido
+        self.registro.agregar(id_partido, partido.difusor, principal=principal)
+        self.despertar()
+        return partido
+
+    def obtener(self, id_partido: str):
+        with self._lock:
+            return self._partidos.get(id_partido)
+
+    def principal(self):
+        with self._lock:
+            return next((p for p in self._partidos.values() if p.principal), None)
+
+    def partidos(self) -> list:
+        with self._lock:
+            return list(self._partidos.values())
+
+    def quitar(self, id_partido: str):
+        with self._lock:
+            partido = self._partidos.pop(id_partido, None)
+        if partido is None:
+            return
+        self.registro.quitar(id_partido)
+        partido.cerrar()
+
+    # ---------- Servidor ----------
+    def iniciar_servidor(self, port: int = 3333, intentos: int = 10):
+        """Levanta el servidor (una vez) en el primer puerto libre a partir de `port`."""
+        if self.httpd is not None:
+            return self.http_port
+        for p in range(port, port + intentos):
+            try:
+                self.httpd = iniciar_servidor(self.directorio, p, self.registro, api=self.comandos.ejecutar,
+                                              metricas=self.metricas)
+            except OSError:
+                continue
+            self.http_port = p
+            return p
+        return None
+
+    def metricas(self) -> dict:
+        """Métricas del proceso más, por partido, versión, clientes SSE, escritor y overlays en cola."""
+        foto = METRICAS.foto()
+        foto["partidos"] = {}
+        for p in self.partidos():
+            foto["partidos"][p.id] = {
+                "version": p.difusor.version, "clientes_sse": p.difusor.clientes(),
+                "escritor": p.escritor.stats(), "overlays": len(p.overlays_pendientes()),
+            }
+        return foto
+
+    # ---------- Vencimientos ----------
+    def despertar(self):
+        with self._cond:
+            self._cond.notify()
+
+    def _bucle_vencimientos(self):
+        while True:
+            with self._cond:
+                if not self._activo:
+                    return
+                proximos = [t for t in (p.proximo_vencimiento_ms() for p in self.partidos()) if t]
+                if proximos:
+                    falta = (min(proximos) - self.reloj.ahora_ms()) / 1000
+                    if falta > 0:
+                        self._cond.wait(falta)
+                else:
+                    self._cond.wait()
+                if not self._activo:
+                    return
+            ahora = self.reloj.ahora_ms()
+            for p in self.partidos():
+                try:
+                    p.vencer(ahora)
+                except Exception as e:
+                    diario.error("motor", f"vencer: {e}", partido=p.id)
+
+    def avanzar(self, ms: int) -> int:
+        """
+        Adelanta el reloj falso `ms`, deteniéndose en cada vencimiento (fin de
+        periodo, overlay, destello) para aplicarlo en su instante exacto.
+        Devuelve cuántos vencimientos aplicó.
+        """
+        destino = self.reloj.ahora_ms() + int(ms)
+        aplicados = 0
+        while True:
+            proximos = [t for t in (p.proximo_vencimiento_ms() for p in self.partidos()) if t]
+            t = min(proximos) if proximos else None
+            if t is None or t > destino:
+                break
+            self.reloj.fijar(max(t, self.reloj.ahora_ms()))
+            for p in self.partidos():
+                p.vencer(self.reloj.ahora_ms())
+            aplicados += 1
+        self.reloj.fijar(destino)
+        return aplicados
+
+    def detener_servidor(self):
+        if self.httpd is not None:
+            try: detener_servidor(self.httpd, self.registro)
+            except Exception as e: diario.error("http.server", e)
+            self.httpd = None
+            self.http_port = None
+
+    def cerrar(self):
+        for id_partido in [p.id for p in self.partidos()]:
+            self.quitar(id_partido)
+        self.detener_servidor()
+        with self._cond:
+            self._activo = False
+            self._cond.notify()
+
+# Un motor por proceso: launcher y Marcador comparten servidor y partidos
+_motor = None
+
+def obtener_motor() -> Motor:
+    global _motor
+    if _motor is None:
+        _motor = Motor()
+    return _motor
+
+# ------------------ Sin GUI ------------------
+if __name__ == "__main__":
+    # python motor.py [puerto] [--grabar] [id_partido ...]: partidos manejados sólo por la API
+    import sys
+    from comun import obtener_config, leer_equipos
+
+    args = sys.argv[1:]
+    grabar = "--grabar" in args
+    args = [a for a in args if a != "--grabar"]
+    puerto = int(args.pop(0)) if args and args[0].isdigit() else 3333
+    config = obtener_config()
+    diario.configurar(config)
+    _, colores, imagenes = leer_equipos()
+    motor = obtener_motor()
+    motor.crear(PARTIDO_PRINCIPAL, config, colores, imagenes, principal=True).render()
+    for id_partido in args:
+        motor.crear(id_partido, config, colores, imagenes).render()
+    grabadores = []
+    if grabar:
+        from repeticion import Grabador
+        grabadores = [Grabador(p) for p in motor.partidos()]
+    puerto = motor.iniciar_servidor(puerto)
+    if puerto is None:
+        sys.exit("[motor] no se pudo iniciar el servidor HTTP (puertos ocupados)")
+    print(f"[motor] API en http://localhost:{puerto}/api  partidos: {', '.join(motor.registro.ids())}", flush=True)
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for g in grabadores:
+            g.detener()
+            print(f"[motor] grabación: {g.ruta} ({g.pasos} pasos)")
+        motor.cerrar()
@@ -0,0 +1,175 @@
+from PyQt6.QtWidgets import (
+    QWidget, QVBoxLayout, QHBoxLayout, QGridLayout, QGroupBox, QLabel, QPushButton
+)
+from PyQt6.QtGui import QKeySequence, QShortcut
+from PyQt6.QtCore import Qt, QTimer
+
+from comun import obtener_plantel
+
+# Atajos (con el foco en el panel): goles y acciones, dorsal + Enter para el jugador
+ATAJOS = {
+    "L": ("gol", "local"), "V": ("gol", "visita"),
+    "A": ("accion", "amarilla"), "R": ("accion", "roja"), "C": ("accion", "sale"),
+    "Left": ("lado", "local"), "Right": ("lado", "visita"),
+    "Esc": ("cancelar", None),
+}
+COLUMNAS = 4
+TEXTOS = {
+    "anotador": "Gol {LADO}: anotador (clic o dorsal+Enter)",
+    "amarilla": "Amarilla {LADO}: ¿a quién?",
+    "roja": "Roja {LADO}: ¿a quién?",
+    "sale": "Cambio {LADO}: ¿quién sale?",
+    "entra": "Cambio {LADO}: sale {sale}, ¿quién entra?",
+}
+
+class PanelRapido(QWidget):
+    """
+    Carga rápida sin diálogos: botones por jugador de cada lado y atajos
+    de teclado. Cada acción va directa al partido, así que el overlay sale
+    al instante; el anotador de un gol se elige después (se completa en el
+    overlay si sigue en pantalla). Nunca abre un bucle de eventos anidado.
+    """
+    def __init__(self, marcador):
+        super().__init__(marcador)
+        self.marcador = marcador
+        self.accion = None   # None, "anotador", "amarilla", "roja", "sale" o "entra"
+        self.lado = "local"
+        self.sale = ""
+        self.dorsal = ""
+        self._version_plantel = None
+        self._botones = {"local": [], "visita": []}
+
+        layout = QVBoxLayout(); layout.setContentsMargins(0, 0, 0, 0); self.setLayout(layout)
+        fila = QHBoxLayout(); layout.addLayout(fila)
+        for txt, accion in (("Amarilla (A)", "amarilla"), ("Roja (R)", "roja"), ("Cambio (C)", "sale")):
+            b = QPushButton(txt); b.clicked.connect(lambda _, a=accion: self.iniciar(a)); fila.addWidget(b)
+        b = QPushButton("Cancelar (Esc)"); b.clicked.connect(self.cancelar); fila.addWidget(b)
+        self.estado_label = QLabel(""); fila.addWidget(self.estado_label, 1)
+
+        lados = QHBoxLayout(); layout.addLayout(lados)
+        self.grupos, self.grillas = {}, {}
+        for lado in ("local", "visita"):
+            self.grupos[lado] = QGroupBox(); self.grillas[lado] = QGridLayout()
+            self.grupos[lado].setLayout(self.grillas[lado]); lados.addWidget(self.grupos[lado])
+
+        # Teclas sin modificador: sólo con el foco en el panel (o en uno de sus
+        # botones), para no marcar un gol tecleando en otro control del Marcador
+        self.setFocusPolicy(Qt.FocusPolicy.StrongFocus)
+        for tecla, (tipo, valor) in ATAJOS.items():
+            self._atajo_tecla(tecla, lambda t=tipo, v=valor: self._atajo(t, v))
+        for n in range(10):
+            self._atajo_tecla(str(n), lambda n=n: self._digito(str(n)))
+        for tecla in ("Return", "Enter"):
+            self._atajo_tecla(tecla, self._por_dorsal)
+
+        # El plantel carga en segundo plano: se arman los botones cuando esté
+        # (y de nuevo si jugadores.xlsx cambia)
+        self._vigilar = QTimer(self); self._vigilar.timeout.connect(self.recargar)
+        self._vigilar.start(1000)
+        self.recargar()
+        self.refrescar()
+
+    # ---------- Botones de jugadores ----------
+    def recargar(self, forzar: bool = False):
+        plantel = obtener_plantel()
+        if not plantel.listo() or (plantel.version == self._version_plantel and not forzar):
+            return
+        self._version_plantel = plantel.version
+        for lado in ("local", "visita"):
+            grilla = self.grillas[lado]
+            for b in self._botones[lado]:
+                grilla.removeWidget(b); b.deleteLater()
+            self._botones[lado] = []
+            for i, jugador in enumerate(self.marcador.jugadores_equipo_actual(lado)):
+                b = QPushButton(jugador)
+                b.clicked.connect(lambda _, l=lado, j=jugador: self.elegir(l, j))
+                grilla.addWidget(b, i // COLUMNAS, i % COLUMNAS)
+                self._botones[lado].append(b)
+        self.refrescar()
+
+    # ---------- Acciones ----------
+    def pedir_anotador(self, lado: str):
+        """Tras un gol: el próximo jugador elegido de ese lado es el anotador."""
+        self.accion, self.lado, self.dorsal = "anotador", lado, ""
+        self.setFocus()  # dorsal + Enter sin tener que hacer clic en el panel
+        self.refrescar()
+
+    def iniciar(self, accion: str):
+        self.accion, self.sale, self.dorsal = accion, "", ""
+        self.setFocus()
+        self.refrescar()
+
+    def cancelar(self):
+        self.accion, self.sale, self.dorsal = None, "", ""
+        self.refrescar()
+
+    def elegir(self, lado: str, jugador: str):
+        partido = self.marcador.partido
+        accion, self.lado, self.dorsal = self.accion, lado, ""
+        if accion == "anotador":
+            partido.anotador(lado, jugador)
+            self.marcador.notificar(f"Anotador: {jugador}", 1500)
+            self.accion = None
+        elif accion in ("amarilla", "roja"):
+            partido.tarjeta(lado, jugador, accion, dur_ms=5500)
+            self.accion = None
+        elif accion == "sale":
+            self.sale, self.accion = jugador, "entra"
+        elif accion == "entra":
+            if jugador == self.sale:
+                self.marcador.notificar("El que sale y el que entra no pueden ser el mismo", 3000)
+                return
+            partido.cambio(lado, self.sale, jugador, dur_ms=5500)
+            self.accion, self.sale = None, ""
+        else:
+            self.marcador.notificar("Elige primero una acción (gol, tarjeta o cambio)", 2000)
+        self.refrescar()
+
+    # ---------- Teclado ----------
+    def _atajo_tecla(self, tecla: str, fn):
+        atajo = QShortcut(QKeySequence(tecla), self)
+        atajo.setContext(Qt.ShortcutContext.WidgetWithChildrenShortcut)
+        atajo.activated.connect(fn)
+
+    def _atajo(self, tipo: str, valor):
+        if tipo == "gol":
+            self.marcador.gol(valor)
+        elif tipo == "accion":
+            self.iniciar(valor)
+        elif tipo == "lado":
+            if self.accion != "entra":  # el que entra es del mismo lado que el que sale
+                self.lado = valor
+            self.refrescar()
+        else:
+            self.cancelar()
+
+    def _digito(self, d: str):
+        if self.accion is None:
+            return
+        self.dorsal = (self.dorsal + d)[-3:]
+        self.refrescar()
+
+    def _por_dorsal(self):
+        if not self.dorsal or self.accion is None:
+            return
+        jugador = next((b.text() for b in self._botones[self.lado] if b.text().split(" ", 1)[0] == self.dorsal), None)
+        if jugador is None:
+            self.marcador.notificar(f"No hay dorsal {self.dorsal} en {self.lado}", 2000)
+            self.dorsal = ""
+            self.refrescar()
+            return
+        self.elegir(self.lado, jugador)
+
+    def refrescar(self):
+        self.grupos["local"].setTitle(f"Local · {self.marcador.partido.equipo_local}")
+        self.grupos["visita"].setTitle(f"Visita · {self.marcador.partido.equipo_visita}")
+        for lado, grupo in self.grupos.items():
+            activo = self.accion is not None and lado == self.lado
+            grupo.setStyleSheet("QGroupBox { border: 2px solid #f6c400; }" if activo else "")
+        if self.accion is None:
+            txt = "L/V gol · A/R tarjeta · C cambio · ←/→ lado · dorsal+Enter"
+        else:
+            txt = TEXTOS[self.accion].format(LADO=self.lado.upper(), sale=self.sale)
+            if self.dorsal:
+                txt += f"  [{self.dorsal}]"
+        self.estado_label.setText(txt)
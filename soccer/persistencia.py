@@ -0,0 +1,85 @@
+import json
+import time
+import threading
+
+from escritor import escribir_atomico
+import diario
+
+def serializar_config(cfg: dict) -> bytes:
+    """JSON compacto (sin indentación) para config.json."""
+    return json.dumps(cfg, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+class PersistenciaConfig:
+    """
+    Guarda config.json desde un hilo de fondo.
+
+    guardar() sólo toma una foto serializada del config (barato, en el hilo
+    de la UI) y despierta al hilo; éste espera `espera_s` sin pedidos nuevos
+    para juntar ráfagas, pero nunca más de `max_espera_s` desde el primer
+    pedido pendiente. La escritura es atómica y se omite si no cambió nada.
+    """
+    def __init__(self, ruta: str, espera_s: float = 0.25, max_espera_s: float = 1.0):
+        self.ruta = ruta
+        self.espera_s = espera_s
+        self.max_espera_s = max_espera_s
+        self._cond = threading.Condition()
+        self._io = threading.Lock()
+        self._pendiente = None
+        self._primer_pedido = 0.0
+        self._ultimo_pedido = 0.0
+        self._ultimo_escrito = None
+        self._activo = True
+        self.pedidos = 0
+        self.guardados = 0
+        self._hilo = threading.Thread(target=self._bucle, name="persistencia-config", daemon=True)
+        self._hilo.start()
+
+    def guardar(self, cfg: dict):
+        datos = serializar_config(cfg)
+        ahora = time.monotonic()
+        with self._cond:
+            if self._pendiente is None:
+                self._primer_pedido = ahora
+            self._pendiente = datos
+            self._ultimo_pedido = ahora
+            self.pedidos += 1
+            self._cond.notify()
+
+    def _bucle(self):
+        while True:
+            with self._cond:
+                while self._activo and self._pendiente is None:
+                    self._cond.wait()
+                if not self._activo:
+                    return
+                # debounce acotado: esperar silencio, con tope desde el primer pedido
+                while self._activo:
+                    limite = min(self._ultimo_pedido + self.espera_s, self._primer_pedido + self.max_espera_s)
+                    falta = limite - time.monotonic()
+                    if falta <= 0:
+                        break
+                    self._cond.wait(falta)
+            self.vaciar()
+
+    def vaciar(self):
+        """Escribe ya lo pendiente (desde cualquier hilo)."""
+        with self._io:
+            with self._cond:
+                datos, self._pendiente = self._pendiente, None
+            if datos is None or datos == self._ultimo_escrito:
+                return
+            try:
+                escribir_atomico(self.ruta, datos, fsync=True)
+            except OSError as e:
+                diario.error("persistencia", e)
+                return
+            self._ultimo_escrito = datos
+            self.guardados += 1
+
+    def detener(self):
+        """Para el hilo y garantiza el último guardado."""
+        with self._cond:
+            self._activo = False
+            self._cond.notify()
+        self._hilo.join(timeout=2)
+        self.vaciar()
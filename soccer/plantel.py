@@ -0,0 +1,149 @@
+import os
+import pickle
+import hashlib
+import threading
+import unicodedata
+
+from escritor import escribir_atomico
+import diario
+
+CACHE_VERSION = 1
+ALIAS_VISITA = ("visita", "visitantes", "ovisitantes", "visitante")
+
+def normalizar(nombre) -> str:
+    """Clave de búsqueda: sin acentos, minúsculas y espacios colapsados."""
+    s = unicodedata.normalize("NFKD", str(nombre or ""))
+    s = "".join(c for c in s if not unicodedata.combining(c))
+    return " ".join(s.lower().split())
+
+# ------------------ Caché de libros Excel ------------------
+def _firma(ruta: str) -> dict:
+    st = os.stat(ruta)
+    return {"mtime_ns": st.st_mtime_ns, "size": st.st_size}
+
+def _sha1(ruta: str) -> str:
+    h = hashlib.sha1()
+    with open(ruta, "rb") as f:
+        for bloque in iter(lambda: f.read(1 << 16), b""):
+            h.update(bloque)
+    return h.hexdigest()
+
+def cargar_libro(ruta_xlsx: str, ruta_cache: str, parsear):
+    """
+    Devuelve parsear(ruta_xlsx) usando una caché pickle al lado.
+    La caché vale si coinciden mtime+tamaño, o si cambió el mtime pero el
+    contenido (sha1) es el mismo. Lanza OSError si el xlsx no existe.
+    """
+    firma = _firma(ruta_xlsx)
+    cache = None
+    try:
+        with open(ruta_cache, "rb") as f:
+            cache = pickle.load(f)
+        if cache.get("version") != CACHE_VERSION:
+            cache = None
+    except Exception:
+        cache = None
+
+    if cache is not None:
+        previa = cache["firma"]
+        if previa["mtime_ns"] == firma["mtime_ns"] and previa["size"] == firma["size"]:
+            return cache["datos"]
+        sha1 = _sha1(ruta_xlsx)
+        if previa.get("sha1") == sha1:
+            _guardar_cache(ruta_cache, {**firma, "sha1": sha1}, cache["datos"])
+            return cache["datos"]
+    else:
+        sha1 = _sha1(ruta_xlsx)
+
+    datos = parsear(ruta_xlsx)
+    _guardar_cache(ruta_cache, {**firma, "sha1": sha1}, datos)
+    return datos
+
+def _guardar_cache(ruta_cache: str, firma: dict, datos):
+    try:
+        os.makedirs(os.path.dirname(ruta_cache), exist_ok=True)
+        blob = pickle.dumps({"version": CACHE_VERSION, "firma": firma, "datos": datos}, protocol=pickle.HIGHEST_PROTOCOL)
+        escribir_atomico(ruta_cache, blob)
+    except OSError as e:
+        diario.error("plantel", f"no se pudo guardar la caché: {e}")
+
+# ------------------ Jugadores ------------------
+def parsear_jugadores(ruta_xlsx: str) -> dict:
+    """jugadores.xlsx -> {"hojas": [nombres en orden], "jugadores": {hoja: ["10 Nombre", ...]}}"""
+    import pandas as pd
+    libro = pd.read_excel(ruta_xlsx, sheet_name=None, header=None)
+    jugadores = {}
+    for hoja, df in libro.items():
+        lista = []
+        for fila in df.itertuples(index=False):
+            nombre = str(fila[0]).strip() if not pd.isna(fila[0]) else ""
+            numero = str(int(fila[1])) if (len(fila) > 1 and not pd.isna(fila[1])) else ""
+            if nombre: lista.append(f"{numero} {nombre}".strip())
+        jugadores[hoja] = lista
+    return {"hojas": list(libro.keys()), "jugadores": jugadores}
+
+class Plantel:
+    """
+    Índice en memoria de jugadores.xlsx, por nombre de hoja/equipo normalizado.
+    Se carga una vez (de la caché si está al día) y, con vigilar(), se
+    recarga en segundo plano cuando cambia el archivo.
+    """
+    def __init__(self, ruta_xlsx: str, ruta_cache: str):
+        self.ruta_xlsx = ruta_xlsx
+        self.ruta_cache = ruta_cache
+        self._indice = {}
+        self._hojas = []
+        self._firma = None
+        self._listo = threading.Event()
+        self._vigilando = False
+        self.version = 0  # sube en cada carga (para refrescar vistas)
+
+    def cargar(self):
+        try:
+            firma = _firma(self.ruta_xlsx)
+            datos = cargar_libro(self.ruta_xlsx, self.ruta_cache, parsear_jugadores)
+        except Exception as e:
+            diario.error("plantel", e)
+            datos, firma = {"hojas": [], "jugadores": {}}, None
+        # se reemplaza el índice completo de una vez (lecturas sin lock)
+        self._indice = {normalizar(h): lista for h, lista in datos["jugadores"].items()}
+        self._hojas = [normalizar(h) for h in datos["hojas"]]
+        self._firma = firma
+        self.version += 1
+        self._listo.set()
+
+    def listo(self) -> bool:
+        """True si ya hay índice (jugadores() no va a esperar)."""
+        return self._listo.is_set()
+
+    def cargar_en_fondo(self):
+        threading.Thread(target=self.cargar, name="plantel-carga", daemon=True).start()
+
+    def jugadores(self, hoja: str) -> list:
+        """Misma resolución que leer_jugadores(): hoja exacta, alias de visita o la primera."""
+        if not self._listo.is_set():
+            self._listo.wait(10)
+        indice, hojas = self._indice, self._hojas
+        if not hojas:
+            return []
+        clave = normalizar(hoja)
+        if clave not in indice and clave in ALIAS_VISITA:
+            clave = next((a for a in ALIAS_VISITA if a in indice), None)
+        if clave not in indice:
+            clave = hojas[0]
+        return list(indice[clave])
+
+    def vigilar(self, intervalo_s: float = 2.0):
+        if self._vigilando:
+            return
+        self._vigilando = True
+        def _bucle():
+            evento = threading.Event()
+            while not evento.wait(intervalo_s):
+                try:
+                    firma = _firma(self.ruta_xlsx)
+                except OSError:
+                    continue
+                if firma != self._firma:
+                    self.cargar()
+        threading.Thread(target=_bucle, name="plantel-vigilar", daemon=True).start()
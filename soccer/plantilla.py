@@ -0,0 +1,494 @@
+import re
+
+# ------------------ Plantilla HTML ------------------
+PLANTILLA_HTML = """<!DOCTYPE html>
+<html lang="es">
+<head>
+<meta charset="utf-8" />
+%%BASE_HREF%%
+<meta name="viewport" content="width=device-width, initial-scale=1" />
+<meta http-equiv="Cache-Control" content="no-cache, no-store, must-revalidate"/>
+<meta http-equiv="Pragma" content="no-cache"/>
+<meta http-equiv="Expires" content="0"/>
+<!-- Todo el manifiesto de activos (escudos, fondos, marca, stats), con URLs versionadas -->
+%%PRELOAD%%
+<title>Marcador</title>
+<style>
+:root{
+  --bug-scale: %%BUG_SCALE%%;
+  --mid-w: 950px;
+  --mid-w-expanded: 1250px;
+  --left-w: 300px;
+  --right-w: 36px;
+  --canvas-width: 1920px;
+  --canvas-height: 1080px;
+  --scorebug-top: 24px;
+  --scorebug-left: 24px;
+  --color-local: %%COLOR_LOCAL%%;
+  --color-visita: %%COLOR_VISITA%%;
+  --color-text-local: %%COLOR_TEXT_LOCAL%%;
+  --color-text-visita: %%COLOR_TEXT_VISITA%%;
+}
+html,body{ margin:0; padding:0; width:var(--canvas-width); height:var(--canvas-height);
+  background-color:rgba(0,0,0,0)!important; overflow:hidden; font-family:'Inter','SF Pro Display','Segoe UI',Arial,sans-serif; color:#111; }
+.stage{ position:relative; width:var(--canvas-width); height:var(--canvas-height); }
+#bug-wrap{ position:absolute; top:var(--scorebug-top); left:var(--scorebug-left); transform:scale(var(--bug-scale)); transform-origin:top left;
+  filter:drop-shadow(0 12px 28px rgba(0,0,0,.35)); }
+#ea-scorebug{ display:flex; align-items:stretch; transition:width .70s cubic-bezier(.2,.7,.2,1); }
+
+/* IZQUIERDA */
+.ea-left{ display:flex; flex-direction:column; width:var(--left-w); }
+.ea-tri,.ea-comp,.ea-time,.time-extra{ width:var(--left-w); box-sizing:border-box; }
+.ea-tri{ height:110px; background:#111; border-top-left-radius:10px; display:flex; align-items:center; justify-content:center; overflow:hidden; }
+.ea-tri img{ max-width: calc(var(--left-w) - 20px); max-height: 96px; width:auto; height:auto; object-fit:contain; }
+.ea-comp{ background:#111; color:#fff; font-weight:900; font-size:28px; letter-spacing:.7px; padding:16px 18px; border-bottom:1px solid rgba(255,255,255,.08);}
+.ea-time{ background:#2FE05B; color:#000; font-weight:900; font-size:64px; padding:18px 24px; line-height:1; display:flex; align-items:center; justify-content:center; }
+.time-extra{ background:#2FE05B; color:#000; font-weight:900; font-size:56px; line-height:1; padding:0 18px; overflow:hidden; max-height:0; width:var(--left-w);
+  transition:max-height .70s cubic-bezier(.2,.7,.2,1), padding .70s cubic-bezier(.2,.7,.2,1); border-bottom-left-radius:10px; }
+.time-extra.show{ max-height:56px; padding:10px 18px; }
+
+/* EXPANDER */
+#bug-outer{ display:inline-block; width:auto; }
+#expander{
+  width:100%;
+  background:#fff; color:#111;
+  border-radius:0 0 10px 10px;
+  overflow:hidden;
+  box-shadow:0 10px 24px rgba(0,0,0,.20);
+  max-height:0;
+  transition:max-height .45s ease;
+  will-change:max-height;
+}
+#expander.open{ max-height:460px; }
+/* El panel usa el ancho del bug expandido */
+.panel-lg{ width: calc(var(--left-w) + var(--mid-w-expanded) + var(--right-w)); max-width: calc(var(--left-w) + var(--mid-w-expanded) + var(--right-w)); padding: 22px 24px; } 
+#expander .panel{ background:#fff; color:#111; }
+
+/* CENTRO */
+.ea-mid{ background:#fff; color:#111; display:flex; flex-direction:column; padding:20px 24px; row-gap:16px; 
+  width:var(--mid-w); transition:width .70s cubic-bezier(.2,.7,.2,1); box-sizing:border-box; 
+  border-top-right-radius: 0; border-bottom-right-radius: 0; } 
+
+#ea-scorebug.expanded .ea-mid{ width:var(--mid-w-expanded); }
+#ea-scorebug.expanded .ea-time{ font-size:74px; padding:22px 28px; }
+#ea-scorebug.expanded .ea-mid .name{ font-size:72px; }
+#ea-scorebug.expanded .ea-mid .score{ font-size:104px; }
+
+.ea-mid .row{ 
+    display:grid; 
+    grid-template-columns: 180px 48px 1fr minmax(100px, auto); 
+    align-items:center; 
+    column-gap:22px; 
+}
+.ea-mid .name{ font-weight:900; font-size:64px; letter-spacing:.2px; white-space:nowrap; overflow:hidden; text-overflow:ellipsis; min-width:300px; } 
+.ea-mid .score{ font-weight:900; font-size:96px; text-align:right; min-width:100px; color:#111; }
+
+.crest{ width:180px; height:180px; object-fit:contain; display:block; }
+.reds{ display:flex; gap:8px; justify-content:flex-start; align-items: center; }
+.rc{ width:40px; height:44px; background:#D32F2F; border-radius:6px; }
+
+/* DERECHA */
+.ea-right{ display:flex; flex-direction:column; width: var(--right-w); min-width: var(--right-w); border-top-right-radius:10px; border-bottom-right-radius:10px; overflow:hidden; }
+.right-row{ flex:1 1 auto; }
+.right-row.local{ background: var(--color-local); }
+.right-row.visita{ background: var(--color-visita); }
+
+/* Paneles grandes - Overlays */
+.panel{ background:rgba(0,0,0,.92); border-radius:14px; padding:22px 24px; display:flex; align-items:center; gap:18px; box-shadow:0 10px 24px rgba(0,0,0,.35); margin:14px; font-size:22px; }
+.panel .chip{ font-weight:900; padding:10px 16px; border-radius:10px; letter-spacing:.6px; text-transform:uppercase; }
+.panel .line{ display:flex; align-items:center; gap:24px; flex-wrap:wrap; }
+.team-long{ padding:6px 12px; border-radius:8px; font-weight:900; font-size:32px; }
+.score-big{ font-weight:900; font-size:100px; }
+.player-big{ font-weight:800; font-size:48px; }
+.num-big{ font-weight:900; font-size:44px; min-width:48px; text-align:right; }
+.pname-big{ font-weight:800; font-size:44px; }
+
+/* STATS */
+.stats-icon{ width:200px; height:200px; object-fit:contain; display:inline-block; margin-left: 24px; }
+.stats-content{ flex-grow: 1; display:flex; flex-direction: column; }
+#stats .stats-track{ flex:1 1 auto; height:44px; border-radius:12px; overflow:hidden; display:flex; margin:12px 0; background:#fff; border:1px solid rgba(0,0,0,.08); } 
+#stats .seg{ display:flex; align-items:center; justify-content:center; font-weight:900; line-height:1; font-size:26px; } 
+#stats .seg.local{ background: var(--color-local); color: var(--color-text-local); }
+#stats .seg.visita{ background: var(--color-visita); color: var(--color-text-visita); }
+.stats-wrap{ display:flex; align-items:center; gap:18px; flex-grow: 1; }
+
+/* Colores por lado/tipo de los overlays (plantillas <template> de abajo) */
+#goal.local .chip, #goal.local .team-long{ background:var(--color-local); color:var(--color-text-local); }
+#goal.visita .chip, #goal.visita .team-long{ background:var(--color-visita); color:var(--color-text-visita); }
+#card.amarilla .chip{ background:#FBC02D; color:#000; }
+#card.roja .chip{ background:#D32F2F; color:#fff; }
+
+/* Triángulos cambio */
+.tri{ width:0; height:0; }
+.tri-left{ border-top:10px solid transparent; border-bottom:10px solid transparent; border-right:16px solid #00e676; }
+.tri-right{ border-top:10px solid transparent; border-bottom:10px solid transparent; border-left:16px solid #ff5252; }
+.num-big.out{ color:#ff5252; }
+</style>
+</head>
+<body>
+<div class="stage">
+  <div id="bug-wrap">
+    <div id="bug-outer">
+      <div id="ea-scorebug">
+        <div class="ea-left">
+          <div class="ea-tri"><img id="brand" src="%%BRAND%%" alt="Brand" onerror="this.style.display='none'"/></div>
+          <div class="ea-comp">CONADEIP</div>
+          <div class="ea-time"><span id="ea-clock">%%RELOJ%%</span></div>
+          <div id="time-extra" class="time-extra%%EXTRA_CLASS%%">%%EXTRA_TXT%%</div>
+        </div>
+        <div class="ea-mid">
+          <div class="row">
+            %%CREST_MID_L%%
+            <span class="reds" id="redsL">%%REDS_L%%</span>
+            <span class="name" id="teamL">%%TEAM_L%%</span>
+            <span class="score" id="scoreL">%%SCORE_L%%</span>
+          </div>
+          <div class="row">
+            %%CREST_MID_R%%
+            <span class="reds" id="redsR">%%REDS_R%%</span>
+            <span class="name" id="teamR">%%TEAM_R%%</span>
+            <span class="score" id="scoreR">%%SCORE_R%%</span>
+          </div>
+        </div>
+        <div class="ea-right">
+          <div class="right-row local"></div>
+          <div class="right-row visita"></div>
+        </div>
+      </div>
+      <div id="expander"><div id="expander-inner"></div></div>
+    </div>
+  </div>
+</div>
+<!-- Overlays: el estado sólo trae {type, ...datos}; la página clona y rellena -->
+<template id="tpl-goal">
+  <div id="goal" class="panel panel-lg">
+    <div class="line">
+      <span class="chip">GOL</span>
+      <span class="team-long" data-campo="equipo"></span>
+      <span class="score-big" data-campo="marcador"></span>
+      <span class="player-big" data-campo="jugador"></span>
+    </div>
+  </div>
+</template>
+<template id="tpl-card">
+  <div id="card" class="panel panel-lg">
+    <div class="line">
+      <span class="chip" data-campo="tipo"></span>
+      <span class="team-long" data-campo="lado"></span>
+      <span class="player-big" data-campo="jugador"></span>
+    </div>
+  </div>
+</template>
+<template id="tpl-sub">
+  <div id="sub" class="panel panel-lg">
+    <div class="line">
+      <span class="chip" style="background:#00e676;">CAMBIO</span>
+      <span class="tri tri-left"></span><span class="num-big" data-campo="num_entra"></span><span class="pname-big" data-campo="entra"></span>
+      <span style="width:24px;"></span>
+      <span class="tri tri-right"></span><span class="num-big out" data-campo="num_sale"></span><span class="pname-big out" data-campo="sale"></span>
+    </div>
+  </div>
+</template>
+<template id="tpl-stats">
+  <div id="stats" class="panel panel-lg">
+    <div class="stats-content">
+        <div class="line" style="gap:18px; flex-wrap:wrap; align-items:center;">
+          <span class="chip" style="background:#eee;" data-campo="titulo"></span>
+        </div>
+        <div class="stats-track">
+          <div class="seg local" data-campo="local"></div>
+          <div class="seg visita" data-campo="visita"></div>
+        </div>
+    </div>
+    <img class='stats-icon' src='%%STATSPNG%%' alt='stats' onerror="this.style.display='none'"/>
+  </div>
+</template>
+</body>
+</html>
+"""
+
+# --- Script de auto-actualización (se inyecta una sola vez en la plantilla) ---
+SCRIPT_AUTO = """<script>
+// aplicarEstado recibe sólo las claves que cambiaron: cada bloque toca su
+// nodo únicamente si su clave viene en `data`. Los nodos se buscan una sola
+// vez (el script va al final del <body>) y los textos se cambian sobre el
+// mismo nodo de texto: nada de innerHTML ni de reconstruir en cada mensaje.
+const $ = (id) => document.getElementById(id);
+const dom = {
+  clock: $('ea-clock'), extra: $('time-extra'),
+  teamL: $('teamL'), teamR: $('teamR'), scoreL: $('scoreL'), scoreR: $('scoreR'),
+  redsL: $('redsL'), redsR: $('redsR'),
+  expander: $('expander'), scorebug: $('ea-scorebug'), expInner: $('expander-inner'),
+};
+const raiz = document.documentElement.style;
+const VARIABLES = {colorL: '--color-local', colorR: '--color-visita', colorTextL: '--color-text-local', colorTextR: '--color-text-visita'};
+const variablesPuestas = {};
+function ponerTexto(el, txt){
+  if (!el) return;
+  txt = String(txt);
+  const n = el.firstChild;
+  if (n && n.nodeType === 3 && !n.nextSibling) {
+    if (n.data !== txt) n.data = txt;
+  } else if (el.textContent !== txt) {
+    el.textContent = txt;
+  }
+}
+// Sólo agrega o quita las tarjetas que sobran/faltan
+function pintarRojas(el, n){
+  while (el.childElementCount > n) el.lastElementChild.remove();
+  while (el.childElementCount < n) {
+    const span = document.createElement('span');
+    span.className = 'rc';
+    el.appendChild(span);
+  }
+}
+// "10 Pérez" -> ['10', 'Pérez']; sin número -> ['', texto]
+function partirJugador(s){
+  s = (s || '').trim();
+  const i = s.indexOf(' ');
+  if (i > 0 && /^[0-9]+$/.test(s.slice(0, i))) return [s.slice(0, i), s.slice(i + 1)];
+  return ['', s];
+}
+const RELLENAR = {
+  goal(panel, c, d){
+    const local = (d.equipo || 'local') === 'local';
+    panel.classList.add(local ? 'local' : 'visita');
+    c.equipo.textContent = (local ? estado.teamL : estado.teamR) || '';
+    c.marcador.textContent = (d.local ?? estado.scoreL ?? 0) + ' : ' + (d.visita ?? estado.scoreR ?? 0);
+    const [num, nombre] = partirJugador(d.jugador);
+    if (d.jugador) c.jugador.textContent = (num ? '#' + num + ' ' : '') + nombre;
+    else c.jugador.remove();
+  },
+  card(panel, c, d){
+    const tipo = d.tipo || 'amarilla';
+    panel.classList.add(tipo === 'amarilla' ? 'amarilla' : 'roja');
+    c.tipo.textContent = tipo.toUpperCase();
+    c.lado.textContent = (d.equipo || 'local') === 'local' ? 'LOCAL' : 'VISITA';
+    c.jugador.textContent = d.jugador || '';
+  },
+  sub(panel, c, d){
+    [c.num_entra.textContent, c.entra.textContent] = partirJugador(d.entra);
+    [c.num_sale.textContent, c.sale.textContent] = partirJugador(d.sale);
+  },
+  stats(panel, c, d){
+    const lv = parseInt(d.local) || 0, vv = parseInt(d.visita) || 0;
+    const pctL = Math.max(0, Math.min(1, lv / Math.max(lv + vv, 1)));
+    c.titulo.textContent = d.titulo || 'Stats';
+    c.local.style.width = (pctL * 100).toFixed(2) + '%';
+    c.visita.style.width = ((1 - pctL) * 100).toFixed(2) + '%';
+    c.local.textContent = lv; c.visita.textContent = vv;
+  },
+};
+function construirOverlay(ov){
+  const tpl = document.getElementById('tpl-' + ov.type);
+  if (!tpl || !RELLENAR[ov.type]) return null;
+  const panel = tpl.content.firstElementChild.cloneNode(true);
+  const campos = {};
+  panel.querySelectorAll('[data-campo]').forEach(n => { campos[n.dataset.campo] = n; });
+  RELLENAR[ov.type](panel, campos, ov);
+  return panel;
+}
+function aplicarEstado(data){
+  try {
+    // reloj: si no hay campos de época (estado viejo), se usa el texto
+    if (estado.start_epoch_ms === undefined && data.clock !== undefined) ponerTexto(dom.clock, data.clock);
+    if ('running' in data || 'start_epoch_ms' in data || 'elapsed_ms' in data || 'base_ms' in data || 'limit_ms' in data) relojSucio = true;
+    // extra time
+    if (dom.extra && 'extra' in data) {
+      const hay = data.extra > 0;
+      dom.extra.classList.toggle('show', hay);
+      ponerTexto(dom.extra, hay ? '+' + data.extra + "'" : '');
+    }
+    // nombres y marcadores
+    if (data.teamL !== undefined) ponerTexto(dom.teamL, data.teamL);
+    if (data.teamR !== undefined) ponerTexto(dom.teamR, data.teamR);
+    if (data.scoreL !== undefined) ponerTexto(dom.scoreL, data.scoreL);
+    if (data.scoreR !== undefined) ponerTexto(dom.scoreR, data.scoreR);
+    // colores: una escritura por variable que de verdad cambió
+    for (const k in VARIABLES) {
+      if (data[k] && variablesPuestas[k] !== data[k]) {
+        raiz.setProperty(VARIABLES[k], data[k]);
+        variablesPuestas[k] = data[k];
+      }
+    }
+    // tarjetas rojas
+    if (dom.redsL && 'redL' in data) pintarRojas(dom.redsL, data.redL || 0);
+    if (dom.redsR && 'redR' in data) pintarRojas(dom.redsR, data.redR || 0);
+    // Overlay: un solo armado de DOM por evento; al cerrar, el panel se queda
+    // hasta que termina la transición de #expander (ver más abajo)
+    if (dom.expander && dom.scorebug && dom.expInner && 'overlay' in data) {
+      const panel = data.overlay ? construirOverlay(data.overlay) : null;
+      if (panel) dom.expInner.replaceChildren(panel);
+      dom.expander.classList.toggle('open', !!panel);
+      dom.scorebug.classList.toggle('expanded', !!panel);
+    }
+  } catch (err) {
+    // error silencioso
+  }
+}
+if (dom.expander) dom.expander.addEventListener('transitionend', (ev) => {
+  if (ev.target === dom.expander && !dom.expander.classList.contains('open')) dom.expInner.replaceChildren();
+});
+// Estado empujado por SSE (events); polling de estado.json sólo si el stream cae.
+// RUTA_DATOS es '' para el partido principal y '/match/<id>/' para los demás.
+const RUTA_DATOS = '%%RUTA_DATOS%%';
+const estado = {};
+let cursor = '';  // "<arranque>-<versión>" del último estado aplicado (lo da el servidor)
+
+// msg = {version, cursor, completo, cambios}; se aplican sólo las claves cuyo valor
+// difiere del que ya tiene la página (overlay es un objeto: se compara su JSON).
+function igual(a, b){
+  return a === b || (typeof a === 'object' && typeof b === 'object' && JSON.stringify(a) === JSON.stringify(b));
+}
+function recibir(msg){
+  const cambios = {};
+  for (const k in msg.cambios) {
+    if (!igual(estado[k], msg.cambios[k])) cambios[k] = msg.cambios[k];
+  }
+  cursor = msg.cursor || '';
+  Object.assign(estado, cambios);
+  if (!sondeo) return aplicarEstado(cambios);
+  const t0 = performance.now();
+  aplicarEstado(cambios);
+  sondeo.anotar(sondeo.aplicar, performance.now() - t0);
+  sondeo.mensajes++;
+}
+
+// Reloj interpolado en la página: base_ms + elapsed_ms + (ahora - start_epoch_ms).
+// "ahora" es la hora (monótona) del servidor: performance.now() más un offset
+// medido contra /time, así un cambio de hora en esta máquina no mueve el reloj.
+// hasta medirlo (o desde file://) se parte de la hora local
+let offsetMs = Date.now() - performance.now();
+let ultimoReloj = '';
+let relojSucio = true;  // algún campo del reloj cambió desde el último dibujo
+async function sincronizarHora(){
+  if (location.protocol === 'file:') return;
+  let mejor = null;
+  for (let i = 0; i < 3; i++) {
+    try {
+      const t0 = performance.now();
+      const resp = await fetch('/time', {cache: 'no-store'});
+      const srv = (await resp.json()).now_ms;
+      const t1 = performance.now();
+      if (!mejor || (t1 - t0) < mejor.rtt) mejor = {rtt: t1 - t0, off: srv - (t0 + t1) / 2};
+    } catch (err) { break; }
+  }
+  if (mejor) offsetMs = mejor.off;
+}
+function relojMs(){
+  let ms = (estado.base_ms || 0) + (estado.elapsed_ms || 0);
+  if (estado.running && estado.start_epoch_ms) ms += Math.max(0, performance.now() + offsetMs - estado.start_epoch_ms);
+  if (estado.limit_ms) ms = Math.min(ms, estado.limit_ms);
+  return ms;
+}
+function dibujarReloj(){
+  if (estado.start_epoch_ms !== undefined && (estado.running || relojSucio)) {
+    relojSucio = false;
+    const seg = Math.floor(relojMs() / 1000);
+    const m = Math.floor(seg / 60), s = seg % 60;
+    const txt = (m < 10 ? '0' + m : '' + m) + ':' + (s < 10 ? '0' + s : '' + s);
+    if (txt !== ultimoReloj) {
+      ponerTexto(dom.clock, txt);
+      ultimoReloj = txt;
+    }
+  }
+  requestAnimationFrame(dibujarReloj);
+}
+let pollTimer = null;
+async function updateScorebug(){
+  try {
+    const resp = await fetch(RUTA_DATOS + 'estado.json?since=' + encodeURIComponent(cursor), {cache: 'no-store'});
+    if (!resp.ok) return;
+    const data = await resp.json();
+    // desde file:// llega el estado.json completo, sin versión
+    recibir(data.cambios !== undefined ? data : {cursor: '', completo: true, cambios: data});
+  } catch (err) {
+    // error silencioso
+  }
+}
+function iniciarPolling(){
+  if (pollTimer) return;
+  pollTimer = setInterval(updateScorebug, 500);
+  updateScorebug();
+}
+function detenerPolling(){
+  if (pollTimer) { clearInterval(pollTimer); pollTimer = null; }
+}
+function conectarEventos(){
+  if (!window.EventSource || location.protocol === 'file:') { iniciarPolling(); return; }
+  const es = new EventSource(RUTA_DATOS + 'events');
+  es.onopen = detenerPolling;
+  es.onmessage = (ev) => recibir(JSON.parse(ev.data));
+  es.onerror = iniciarPolling;  // EventSource reintenta solo; mientras tanto, polling
+}
+// Sonda de frames (?sondeo en la URL): intervalo entre frames y tiempo de
+// aplicarEstado, p50/p99/max y frames sobre 16.7/33 ms. Resumen cada 5 s en
+// window.__sondeo, en la consola y en una esquina de la página.
+function crearSondeo(){
+  const MAX = 600;
+  const s = {frames: [], aplicar: [], mensajes: 0, largas: 0};
+  s.anotar = (lista, ms) => { lista.push(ms); if (lista.length > MAX) lista.shift(); };
+  const pct = (lista, q) => { const o = lista.slice().sort((a, b) => a - b); return o.length ? o[Math.min(o.length - 1, Math.floor(o.length * q))] : 0; };
+  const r = (x) => Math.round(x * 100) / 100;
+  const caja = document.createElement('div');
+  caja.style.cssText = 'position:fixed;right:8px;bottom:8px;padding:4px 8px;background:#111;color:#9f9;font:12px monospace;white-space:pre;z-index:9';
+  document.body.appendChild(caja);
+  let previo = 0;
+  function frame(t){
+    if (previo) s.anotar(s.frames, t - previo);
+    previo = t;
+    requestAnimationFrame(frame);
+  }
+  requestAnimationFrame(frame);
+  try { new PerformanceObserver((l) => { s.largas += l.getEntries().length; }).observe({entryTypes: ['longtask']}); } catch (err) {}
+  setInterval(() => {
+    const f = s.frames;
+    const res = {
+      frame_p50: r(pct(f, .5)), frame_p99: r(pct(f, .99)), frame_max: r(Math.max(0, ...f)),
+      sobre_16: f.filter((x) => x > 1000 / 60 + 1).length, sobre_33: f.filter((x) => x > 33.4).length,
+      aplicar_p50: r(pct(s.aplicar, .5)), aplicar_p99: r(pct(s.aplicar, .99)), mensajes: s.mensajes, tareas_largas: s.largas,
+    };
+    window.__sondeo = res;
+    console.log('[sondeo]', JSON.stringify(res));
+    caja.textContent = 'frame p50 ' + res.frame_p50 + ' p99 ' + res.frame_p99 + ' max ' + res.frame_max + ' ms  >16.7: ' + res.sobre_16
+      + '\\naplicar p50 ' + res.aplicar_p50 + ' p99 ' + res.aplicar_p99 + ' ms  mensajes ' + res.mensajes;
+  }, 5000);
+  return s;
+}
+const sondeo = /[?&]sondeo/.test(location.search) ? crearSondeo() : null;
+sincronizarHora();
+setInterval(sincronizarHora, 60000);
+requestAnimationFrame(dibujarReloj);
+conectarEventos();
+</script>"""
+PLANTILLA_HTML = PLANTILLA_HTML.replace('</body>', SCRIPT_AUTO + '\n</body>')
+
+# ------------------ Compilación ------------------
+_SLOT_RE = re.compile(r"%%([A-Z_]+)%%")
+
+class PlantillaCompilada:
+    """
+    Plantilla partida una sola vez en trozos literales y huecos (%%NOMBRE%%).
+    render() rellena los huecos y hace un único join, en vez de una pasada
+    de str.replace por cada marcador.
+    """
+    __slots__ = ("partes", "huecos")
+
+    def __init__(self, texto: str):
+        trozos = _SLOT_RE.split(texto)
+        # split con grupo: [literal, nombre, literal, nombre, ..., literal]
+        self.partes = trozos
+        self.huecos = tuple((i, trozos[i]) for i in range(1, len(trozos), 2))
+
+    @property
+    def nombres(self) -> set:
+        return {n for _, n in self.huecos}
+
+    def render(self, valores: dict) -> str:
+        partes = self.partes.copy()
+        for i, nombre in self.huecos:
+            partes[i] = valores.get(nombre, "")
+        return "".join(partes)
+
+# Una sola compilación por proceso: la plantilla no depende del partido ni del layout
+PLANTILLA = PlantillaCompilada(PLANTILLA_HTML)
@@ -0,0 +1,50 @@
+"""
+Base de tiempo del motor. El reloj del partido, los vencimientos de
+overlays y /time usan ahora_ms(): la hora de pared leída UNA vez al
+arrancar el proceso más lo que avanzó time.monotonic_ns() desde entonces.
+Así sigue en milisegundos de época (start_epoch_ms se persiste y la
+página lo interpola igual), pero un salto de NTP o un cambio de hora del
+sistema a mitad de partido no mueve el marcador.
+
+La hora de pared "de verdad" sólo cuenta para la persistencia: al
+recuperar un reloj corriendo en otro proceso, el nuevo ancla hace que se
+sume lo que pasó con la app cerrada.
+"""
+import time
+import threading
+
+class RelojSistema:
+    """`pared_ns` y `monotono_ns` se pueden cambiar por fuentes falsas para probarlo."""
+    def __init__(self, pared_ns=time.time_ns, monotono_ns=time.monotonic_ns):
+        self._monotono_ns = monotono_ns
+        self._ancla_ms = pared_ns() // 1_000_000
+        self._mono0_ns = monotono_ns()
+
+    def ahora_ms(self) -> int:
+        return self._ancla_ms + (self._monotono_ns() - self._mono0_ns) // 1_000_000
+
+class RelojFalso:
+    """Reloj manual para simulaciones: sólo avanza con avanzar()/fijar()."""
+    def __init__(self, inicio_ms: int = 1_700_000_000_000):
+        self._ms = int(inicio_ms)
+        self._lock = threading.Lock()
+
+    def ahora_ms(self) -> int:
+        with self._lock:
+            return self._ms
+
+    def avanzar(self, ms: int):
+        with self._lock:
+            self._ms += int(ms)
+
+    def fijar(self, ms: int):
+        with self._lock:
+            if ms < self._ms:
+                raise ValueError("un reloj monótono no retrocede")
+            self._ms = int(ms)
+
+# Reloj del proceso (motor, servidor y página comparten la misma base)
+RELOJ = RelojSistema()
+
+def ahora_ms() -> int:
+    return RELOJ.ahora_ms()
@@ -0,0 +1,201 @@
+"""
+Grabación y repetición de los gráficos de un partido.
+
+Grabador se suscribe a un Partido y anota, con su instante, cada cambio
+del estado servido (sólo las claves que cambiaron) y la salida.html
+cuando cambia: grabaciones/<id>-<fecha>.jsonl. Escribe desde su propio
+hilo, nunca desde el de Qt.
+
+Reproductor vuelve a publicar esa línea de tiempo en un Difusor, a 1x,
+a Nx o tan rápido como pueda (estrés del servidor y de la página con
+ráfagas). El reloj de la página se re-ancla en cada paso para que
+muestre el minuto grabado aunque la repetición vaya más rápida.
+
+Sin GUI:  python repeticion.py <grabacion.jsonl> [--velocidad 1|4|max] [--puerto 3333] [--bucle]
+"""
+import os
+import json
+import time
+import queue
+import threading
+
+from comun import BASE_DIR, GRABACIONES_DIR
+from reloj import RELOJ
+import diario
+
+FORMATO = 1
+_FALTA = object()
+
+# ------------------ Grabador ------------------
+class Grabador:
+    def __init__(self, partido, ruta: str = None):
+        self.partido = partido
+        self.ruta = ruta or os.path.join(GRABACIONES_DIR, f"{partido.id}-{time.strftime('%Y%m%d-%H%M%S')}.jsonl")
+        self.pasos = 0
+        self._lock = threading.Lock()
+        self._cola = queue.SimpleQueue()
+        self._grabado = {}   # estado ya anotado (para guardar sólo el diff)
+        self._html = None
+        self._inicio_ms = partido.reloj.ahora_ms()
+        self._cola.put({"grabacion": FORMATO, "partido": partido.id, "principal": partido.principal,
+                        "inicio_ms": self._inicio_ms})
+        self._al_cambiar(partido, ())  # foto inicial: la repetición arranca del mismo estado
+        partido.suscribir(self._al_cambiar)
+        self._hilo = threading.Thread(target=self._bucle, name=f"grabador-{partido.id}", daemon=True)
+        self._hilo.start()
+
+    def _al_cambiar(self, partido, campos):
+        with self._lock:
+            version, estado = partido.foto()
+            paso = {"t": partido.reloj.ahora_ms() - self._inicio_ms, "v": version}
+            cambios = {k: v for k, v in estado.items() if self._grabado.get(k, _FALTA) != v}
+            if cambios:
+                self._grabado.update(cambios)
+                paso["cambios"] = cambios
+            if partido.html_prev and partido.html_prev != self._html:
+                self._html = paso["html"] = partido.html_prev
+            if len(paso) > 2:
+                self.pasos += 1
+                self._cola.put(paso)
+
+    def _bucle(self):
+        try:
+            os.makedirs(os.path.dirname(self.ruta), exist_ok=True)
+            with open(self.ruta, "a", encoding="utf-8") as f:
+                while True:
+                    paso = self._cola.get()
+                    if paso is None:
+                        return
+                    f.write(json.dumps(paso, ensure_ascii=False) + "\n")
+                    if self._cola.empty():
+                        f.flush()
+        except OSError as e:
+            diario.error("grabador", e, partido=self.partido.id, ruta=self.ruta)
+
+    def detener(self):
+        """Deja de escuchar y espera a que lo pendiente quede en disco."""
+        self.partido.desuscribir(self._al_cambiar)
+        self._cola.put(None)
+        self._hilo.join(timeout=5)
+
+# ------------------ Reproductor ------------------
+def leer_grabacion(ruta: str) -> tuple:
+    """(cabecera, pasos) de un archivo de Grabador; ignora una última línea cortada."""
+    cabecera, pasos = None, []
+    with open(ruta, encoding="utf-8") as f:
+        for linea in f:
+            try:
+                dato = json.loads(linea)
+            except ValueError:
+                break
+            if cabecera is None:
+                if dato.get("grabacion") != FORMATO:
+                    raise ValueError(f"{ruta}: no es una grabación (formato {FORMATO})")
+                cabecera = dato
+            else:
+                pasos.append(dato)
+    if cabecera is None:
+        raise ValueError(f"{ruta}: grabación vacía")
+    return cabecera, pasos
+
+class Reproductor:
+    """
+    Publica en `difusor` los pasos de una grabación. `velocidad` 1 es tiempo
+    real, N es N veces más rápido y 0 es sin esperas. Se puede parar desde
+    otro hilo con detener().
+    """
+    def __init__(self, ruta: str, difusor, velocidad: float = 1.0, reloj=None):
+        self.cabecera, self.pasos = leer_grabacion(ruta)
+        self.difusor = difusor
+        self.velocidad = float(velocidad)
+        self.reloj = reloj or RELOJ
+        self._parar = threading.Event()
+        self._estado = {}  # estado grabado hasta el paso actual (sin re-anclar)
+
+    def detener(self):
+        self._parar.set()
+
+    def cargar(self):
+        """Publica el primer paso (estado inicial y html) para que la página cargue antes de reproducir."""
+        if self.pasos:
+            primero = self.pasos[0]
+            if "html" in primero:
+                self.difusor.publicar_html(primero["html"])
+            self._estado.update(primero.get("cambios", {}))
+            self.difusor.publicar(self._reanclar(primero.get("cambios", {}), primero["t"], self.reloj.ahora_ms()))
+
+    def _reanclar(self, cambios: dict, t_grabado_ms: int, ahora_ms: int) -> dict:
+        """start_epoch_ms trasladado a ahora: el reloj de la página muestra el minuto grabado."""
+        if not self._estado.get("running") or not self._estado.get("start_epoch_ms"):
+            return cambios
+        corrido = self.cabecera["inicio_ms"] + t_grabado_ms - self._estado["start_epoch_ms"]
+        return {**cambios, "start_epoch_ms": ahora_ms - corrido}
+
+    def reproducir(self) -> dict:
+        """Recorre la grabación una vez; devuelve pasos, duración y atraso contra el horario (ms)."""
+        self._parar.clear()
+        inicio_ms = self.reloj.ahora_ms()
+        t0 = time.perf_counter()
+        atrasos = []
+        n = 0
+        for paso in self.pasos:
+            if self._parar.is_set():
+                break
+            if self.velocidad > 0:
+                objetivo = inicio_ms + paso["t"] / self.velocidad
+                falta = objetivo - self.reloj.ahora_ms()
+                if falta > 0 and self._parar.wait(falta / 1000):
+                    break
+                atrasos.append(max(0.0, self.reloj.ahora_ms() - objetivo))
+            if "html" in paso:
+                self.difusor.publicar_html(paso["html"])
+            cambios = paso.get("cambios", {})
+            self._estado.update(cambios)
+            if cambios or self.velocidad != 1:
+                cambios = self._reanclar(cambios, paso["t"], self.reloj.ahora_ms())
+            if cambios:
+                self.difusor.publicar(cambios)
+            n += 1
+        duracion_s = time.perf_counter() - t0
+        atrasos.sort()
+        pct = lambda q: atrasos[min(len(atrasos) - 1, int(len(atrasos) * q))] if atrasos else 0.0
+        return {"pasos": n, "duracion_s": duracion_s, "grabado_s": (self.pasos[-1]["t"] if self.pasos else 0) / 1000,
+                "pasos_por_s": n / duracion_s if duracion_s else 0.0,
+                "atraso_p50_ms": pct(0.5), "atraso_p99_ms": pct(0.99), "version": self.difusor.version}
+
+# ------------------ Sin GUI ------------------
+if __name__ == "__main__":
+    import argparse
+    from servidor import Difusor, Registro, iniciar_servidor, detener_servidor
+
+    ap = argparse.ArgumentParser(description="Repite una grabación de Grabador en el servidor del marcador.")
+    ap.add_argument("grabacion")
+    ap.add_argument("--velocidad", default="1", help="1 = tiempo real, N = N veces más rápido, max = sin esperas")
+    ap.add_argument("--puerto", type=int, default=3333)
+    ap.add_argument("--espera", type=float, default=2.0, help="segundos para conectar OBS/navegador antes de empezar")
+    ap.add_argument("--bucle", action="store_true", help="repetir hasta Ctrl+C")
+    args = ap.parse_args()
+
+    difusor = Difusor()
+    rep = Reproductor(args.grabacion, difusor, 0 if args.velocidad == "max" else float(args.velocidad))
+    id_partido = rep.cabecera["partido"]
+    registro = Registro()
+    # mismo id que al grabar: la salida.html grabada apunta a sus rutas
+    registro.agregar(id_partido, difusor, principal=rep.cabecera.get("principal", False))
+    httpd = iniciar_servidor(BASE_DIR, args.puerto, registro)
+    ruta = "/TXT/salida.html" if rep.cabecera.get("principal") else f"/match/{id_partido}/salida.html"
+    print(f"[repeticion] {len(rep.pasos)} pasos en http://localhost:{args.puerto}{ruta}", flush=True)
+    rep.cargar()
+    try:
+        time.sleep(args.espera)
+        while True:
+            r = rep.reproducir()
+            print(f"[repeticion] {r['pasos']} pasos en {r['duracion_s']:.1f} s (grabado {r['grabado_s']:.1f} s), "
+                  f"{r['pasos_por_s']:.0f} pasos/s, atraso p50 {r['atraso_p50_ms']:.1f} ms p99 {r['atraso_p99_ms']:.1f} ms, "
+                  f"{difusor.clientes()} clientes", flush=True)
+            if not args.bucle:
+                break
+    except KeyboardInterrupt:
+        rep.detener()
+    finally:
+        detener_servidor(httpd, registro)
@@ -0,0 +1,438 @@
+import io
+import os
+import json
+import queue
+import hashlib
+import ipaddress
+import time
+import threading
+from functools import partial
+from urllib.parse import parse_qs, urlsplit
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+from http.server import ThreadingHTTPServer, SimpleHTTPRequestHandler
+
+from reloj import ahora_ms
+from metricas import METRICAS
+import diario
+
+# Estáticos que se sirven con ETag + max-age largo (logos, fondos, stats...)
+CACHEABLES = ('.png', '.jpg', '.jpeg', '.webp', '.gif', '.svg', '.css', '.woff', '.woff2', '.ttf')
+
+def es_local(direccion: str) -> bool:
+    """127.0.0.1 / ::1 (también ::ffff:127.0.0.1): sólo esta máquina controla el partido."""
+    try:
+        ip = ipaddress.ip_address(direccion)
+    except ValueError:
+        return False
+    return ip.is_loopback or (getattr(ip, "ipv4_mapped", None) is not None and ip.ipv4_mapped.is_loopback)
+
+# ------------------ Difusor (SSE) ------------------
+class Difusor:
+    """
+    Mantiene el último estado publicado y reparte los cambios (diff) a cada
+    cliente suscrito a /events. Es seguro llamarlo desde cualquier hilo.
+
+    Cada publicación con cambios sube `version`, y se recuerda en qué versión
+    cambió cada clave: un cliente que ya tiene la versión N sólo recibe las
+    claves cambiadas después (mensaje {"version", "cursor", "completo", "cambios"}).
+
+    El cliente devuelve el `cursor` ("<arranque>-<N>", también el id de SSE),
+    no la versión sola: `version` vuelve a 0 en cada proceso y un N de antes
+    de reiniciar no se distingue de uno de ahora; con otro arranque se manda
+    el estado completo.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._estado = {}
+        self._estado_bytes = b"{}"
+        self._html = None  # (bytes, etag)
+        self._clientes = set()
+        self.version = 0  # sube con cada publicación que cambia algo
+        self.arranque = os.urandom(4).hex()  # distingue esta instancia en los cursores
+        self._versiones = {}  # clave -> versión en que cambió por última vez
+
+    def publicar(self, estado: dict) -> dict:
+        """Publica `estado` y envía sólo las claves que cambiaron. Devuelve el diff."""
+        with self._lock:
+            diff = {k: v for k, v in estado.items() if k not in self._estado or self._estado[k] != v}
+            if not diff:
+                return diff
+            self._estado.update(diff)
+            self._estado_bytes = None
+            self.version += 1
+            for k in diff:
+                self._versiones[k] = self.version
+            cursor = self.cursor()
+            payload = json.dumps({"version": self.version, "cursor": cursor, "completo": False, "cambios": diff},
+                                 ensure_ascii=False)
+            for q in self._clientes:
+                q.put((cursor, payload))
+        return diff
+
+    def estado_bytes(self) -> bytes:
+        """Estado completo serializado (se cachea hasta la siguiente publicación)."""
+        with self._lock:
+            if self._estado_bytes is None:
+                self._estado_bytes = json.dumps(self._estado, ensure_ascii=False).encode('utf-8')
+            return self._estado_bytes
+
+    def cursor(self) -> str:
+        return f"{self.arranque}-{self.version}"
+
+    def _version_de(self, cursor) -> int:
+        """N de un cursor "<arranque>-<N>" de esta instancia; 0 si es de otro arranque o no se entiende."""
+        arranque, _, n = str(cursor or "").rpartition("-")
+        if arranque != self.arranque:
+            return 0
+        try:
+            return int(n)
+        except ValueError:
+            return 0
+
+    def _delta(self, desde) -> str:
+        # cursor desconocido (vacío, de antes de reiniciar el servidor, o de otro partido): estado completo
+        n = self._version_de(desde)
+        completo = not (0 < n <= self.version)
+        cambios = self._estado if completo else {k: self._estado[k] for k, v in self._versiones.items() if v > n}
+        return json.dumps({"version": self.version, "cursor": self.cursor(), "completo": completo, "cambios": cambios},
+                          ensure_ascii=False)
+
+    def delta_bytes(self, desde: str) -> bytes:
+        """Claves que cambiaron después del cursor `desde`."""
+        with self._lock:
+            return self._delta(desde).encode('utf-8')
+
+    def publicar_html(self, html: str):
+        """Guarda en memoria la última salida.html para servirla sin leer disco."""
+        cuerpo = html.encode('utf-8')
+        etag = '"' + hashlib.sha1(cuerpo).hexdigest()[:16] + '"'
+        with self._lock:
+            self._html = (cuerpo, etag)
+
+    def clientes(self) -> int:
+        with self._lock:
+            return len(self._clientes)
+
+    def html(self):
+        with self._lock:
+            return self._html
+
+    def suscribir(self, desde: str = None):
+        """Registra un cliente; devuelve (cola, cursor, delta desde el cursor `desde` serializado)."""
+        q = queue.Queue()
+        with self._lock:
+            self._clientes.add(q)
+            return q, self.cursor(), self._delta(desde)
+
+    def desuscribir(self, q):
+        with self._lock:
+            self._clientes.discard(q)
+
+    def cerrar(self):
+        """Despierta a todos los clientes para que terminen su stream."""
+        with self._lock:
+            for q in self._clientes:
+                q.put(None)
+            self._clientes.clear()
+
+# ------------------ Registro de partidos ------------------
+class Registro:
+    """
+    Difusores por id de partido. El principal además se sirve en las rutas
+    de siempre (/TXT/salida.html, /TXT/estado.json, /events).
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._difusores = {}
+        self._principal = None
+
+    def agregar(self, id_partido: str, difusor: Difusor, principal: bool = False):
+        with self._lock:
+            self._difusores[id_partido] = difusor
+            if principal or self._principal is None:
+                self._principal = id_partido
+
+    def quitar(self, id_partido: str):
+        with self._lock:
+            difusor = self._difusores.pop(id_partido, None)
+            if self._principal == id_partido:
+                self._principal = None
+        if difusor is not None:
+            difusor.cerrar()
+
+    def obtener(self, id_partido: str):
+        with self._lock:
+            return self._difusores.get(id_partido)
+
+    def principal(self):
+        with self._lock:
+            return self._difusores.get(self._principal)
+
+    def id_principal(self):
+        with self._lock:
+            return self._principal
+
+    def ids(self) -> list:
+        with self._lock:
+            return sorted(self._difusores)
+
+    def cerrar(self):
+        with self._lock:
+            difusores = list(self._difusores.values())
+        for d in difusores:
+            d.cerrar()
+
+# ------------------ HTTP ------------------
+class ServidorPool(ThreadingHTTPServer):
+    """
+    ThreadingHTTPServer que atiende las conexiones con un pool acotado de hilos
+    en lugar de crear un hilo por conexión. Cada conexión keep-alive (y cada
+    stream /events) ocupa un worker mientras está abierta.
+    """
+    block_on_close = False
+
+    def __init__(self, addr, handler, max_workers: int = 64):
+        # el pool va antes: si el bind falla, TCPServer llama a server_close()
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="http")
+        super().__init__(addr, handler)
+
+    def process_request(self, request, client_address):
+        self._pool.submit(self.process_request_thread, request, client_address)
+
+    def server_close(self):
+        super().server_close()
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+class _Handler(SimpleHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive
+    timeout = 30                   # cierra conexiones keep-alive inactivas
+    disable_nagle_algorithm = True # cabeceras y cuerpo van en writes separados
+    registro = None
+    api = None          # api(id_partido o None, cuerpo, clave) -> (status, respuesta)
+    metricas = None     # metricas() -> dict para /metrics
+    prefijo = "/TXT"
+    max_cuerpo = 1 << 20
+    keepalive_s = 15
+    max_age = 86400
+
+    def log_message(self, format, *args):
+        pass
+
+    def parse_request(self):
+        self._t0_ns = time.perf_counter_ns()
+        return super().parse_request()
+
+    def log_request(self, code="-", size="-"):
+        """Acceso al diario (sólo con log_nivel "debug"); ms hasta las cabeceras."""
+        if not diario.habilitado(diario.DEBUG):
+            return
+        ruta = self.path.split('?', 1)[0]
+        partes = ruta.split("/")
+        if len(partes) > 2 and partes[1] == "match":
+            partido = partes[2]
+        elif ruta in ("/events", "/api") or ruta.startswith(self.prefijo + "/"):
+            partido = self.registro.id_principal()
+        else:
+            partido = None
+        diario.acceso(self.command, self.path, getattr(code, "value", code),
+                      (time.perf_counter_ns() - getattr(self, "_t0_ns", 0)) / 1e6,
+                      self.client_address[0], partido)
+
+    def _resolver(self, ruta: str):
+        """
+        Ruta -> (difusor, recurso) para las salidas en memoria:
+        /events y {prefijo}/... van al partido principal,
+        /match/<id>/{salida.html,state,estado.json,events} a ese partido.
+        """
+        if ruta == "/events":
+            return self.registro.principal(), "events"
+        if ruta.startswith(self.prefijo + "/"):
+            recurso = ruta[len(self.prefijo) + 1:]
+            if recurso in ("events", "estado.json", "salida.html"):
+                return self.registro.principal(), recurso
+        if ruta.startswith("/match/"):
+            partes = ruta.split("/")
+            if len(partes) == 4:
+                recurso = "estado.json" if partes[3] == "state" else partes[3]
+                return self.registro.obtener(partes[2]), recurso
+            return None, ""
+        return None, None
+
+    def _desde(self, cabecera: str = None) -> str:
+        """Cursor que ya tiene el cliente: ?since=<cursor> (o la cabecera dada)."""
+        valor = parse_qs(urlsplit(self.path).query).get("since", [None])[0]
+        if valor is None and cabecera:
+            valor = self.headers.get(cabecera)
+        return valor or ""
+
+    def do_GET(self):
+        METRICAS.contar("http_get")
+        difusor, recurso = self._resolver(self.path.split('?', 1)[0])
+        if recurso == "events" and difusor is not None:
+            METRICAS.contar("sse_conexiones")
+            return self._eventos(difusor)
+        return super().do_GET()
+
+    def do_POST(self):
+        """POST /api (partido principal) o /match/<id>/api: comandos JSON, sólo desde esta máquina."""
+        METRICAS.contar("http_post")
+        if not es_local(self.client_address[0]):
+            # el overlay se sirve a toda la red (OBS en otra PC); el control no
+            self.send_error(HTTPStatus.FORBIDDEN, "API sólo desde localhost"); return
+        ruta = self.path.split('?', 1)[0]
+        partes = ruta.split("/")
+        if ruta == "/api":
+            id_partido = None
+        elif len(partes) == 4 and partes[1] == "match" and partes[3] == "api":
+            id_partido = partes[2]
+        else:
+            self.send_error(HTTPStatus.NOT_FOUND); return
+        if self.api is None:
+            self.send_error(HTTPStatus.SERVICE_UNAVAILABLE, "API no disponible"); return
+        if self.headers.get_content_type() != "application/json":
+            # text/plain o un form serían un "simple request" de CORS: cualquier página
+            # abierta en esta máquina (o la fuente de navegador de OBS) podría mandarlo.
+            # Con JSON el navegador pide un preflight OPTIONS, que aquí nunca se acepta.
+            self.send_error(HTTPStatus.UNSUPPORTED_MEDIA_TYPE, "Content-Type debe ser application/json"); return
+        cabecera = self.headers.get("Content-Length")
+        if cabecera is None:
+            self.send_error(HTTPStatus.LENGTH_REQUIRED); return
+        try:
+            largo = int(cabecera)
+        except ValueError:
+            largo = -1
+        if largo < 0:
+            # rfile.read(-1) esperaría al EOF y dejaría el hilo del pool tomado
+            self.send_error(HTTPStatus.BAD_REQUEST, "Content-Length debe ser un entero >= 0"); return
+        if largo > self.max_cuerpo:
+            self.send_error(HTTPStatus.REQUEST_ENTITY_TOO_LARGE); return
+        try:
+            cuerpo = json.loads(self.rfile.read(largo) or b"null")
+        except ValueError:
+            status, respuesta = 400, {"ok": False, "error": "JSON inválido"}
+        else:
+            status, respuesta = self.api(id_partido, cuerpo, self.headers.get("Idempotency-Key"))
+        datos = json.dumps(respuesta, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(datos)))
+        self.send_header("Cache-Control", "no-store")
+        self.end_headers()
+        self.wfile.write(datos)
+
+    def send_head(self):
+        ruta = self.path.split('?', 1)[0]
+        if ruta == "/time":
+            # hora del servidor para que la página calcule su offset de reloj
+            ahora = json.dumps({"now_ms": ahora_ms()}).encode('utf-8')
+            return self._memoria(ahora, "application/json", "no-store")
+        if ruta == "/metrics":
+            datos = self.metricas() if self.metricas is not None else METRICAS.foto()
+            return self._memoria(json.dumps(datos, ensure_ascii=False).encode('utf-8'), "application/json; charset=utf-8", "no-store")
+        if ruta == "/matches":
+            return self._memoria(json.dumps(self.registro.ids()).encode('utf-8'), "application/json", "no-store")
+        difusor, recurso = self._resolver(ruta)
+        if difusor is not None and recurso == "estado.json":
+            if "since=" in self.path:
+                return self._memoria(difusor.delta_bytes(self._desde()), "application/json; charset=utf-8", "no-store")
+            return self._memoria(difusor.estado_bytes(), "application/json; charset=utf-8", "no-store")
+        if difusor is not None and recurso == "salida.html":
+            html = difusor.html()
+            if html is not None:
+                return self._memoria(html[0], "text/html; charset=utf-8", "no-cache", etag=html[1])
+        if recurso is not None and not ruta.startswith(self.prefijo + "/"):
+            # /match/<id>/... de un partido que no existe
+            self.send_error(HTTPStatus.NOT_FOUND, "Partido no encontrado")
+            return None
+
+        self._cabeceras_extra = []
+        path = self.translate_path(self.path)
+        if path.lower().endswith(CACHEABLES) and os.path.isfile(path):
+            st = os.stat(path)
+            etag = f'"{st.st_mtime_ns:x}-{st.st_size:x}"'
+            cache = f"public, max-age={self.max_age}"
+            if "v=" in urlsplit(self.path).query:
+                # URL con hash de contenido (activos.Manifiesto): nunca cambia
+                cache = "public, max-age=31536000, immutable"
+            if self.headers.get("If-None-Match") == etag:
+                self.send_response(HTTPStatus.NOT_MODIFIED)
+                self.send_header("ETag", etag)
+                self.send_header("Cache-Control", cache)
+                self.end_headers()
+                return None
+            self._cabeceras_extra = [("ETag", etag), ("Cache-Control", cache)]
+        return super().send_head()
+
+    def end_headers(self):
+        for k, v in getattr(self, "_cabeceras_extra", ()):
+            self.send_header(k, v)
+        self._cabeceras_extra = []
+        super().end_headers()
+
+    def _memoria(self, cuerpo: bytes, ctype: str, cache: str, etag: str = None):
+        """Responde desde memoria; devuelve un file-like para do_GET/do_HEAD."""
+        if etag and self.headers.get("If-None-Match") == etag:
+            self.send_response(HTTPStatus.NOT_MODIFIED)
+            self.send_header("ETag", etag)
+            self.end_headers()
+            return None
+        self.send_response(HTTPStatus.OK)
+        self.send_header("Content-Type", ctype)
+        self.send_header("Content-Length", str(len(cuerpo)))
+        self.send_header("Cache-Control", cache)
+        if etag:
+            self.send_header("ETag", etag)
+        self.end_headers()
+        return io.BytesIO(cuerpo)
+
+    def _eventos(self, difusor: Difusor):
+        # al reconectar, EventSource manda el último id recibido: sólo lo que falta
+        q, cursor, inicial = difusor.suscribir(self._desde("Last-Event-ID"))
+        try:
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream; charset=utf-8")
+            self.send_header("Cache-Control", "no-cache")
+            self.send_header("Connection", "keep-alive")
+            self.end_headers()
+            # estado completo (o delta) al conectar; luego sólo diffs, con id = cursor
+            self.wfile.write(f"retry: 1000\nid: {cursor}\ndata: {inicial}\n\n".encode('utf-8'))
+            self.wfile.flush()
+            while True:
+                try:
+                    payload = q.get(timeout=self.keepalive_s)
+                except queue.Empty:
+                    self.wfile.write(b": ping\n\n"); self.wfile.flush()
+                    continue
+                if payload is None:
+                    break
+                cursor, payload = payload
+                self.wfile.write(f"id: {cursor}\ndata: {payload}\n\n".encode('utf-8'))
+                self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError, OSError):
+            pass
+        finally:
+            difusor.desuscribir(q)
+            self.close_connection = True
+
+def iniciar_servidor(directorio: str, port: int, registro: Registro, prefijo: str = "/TXT", api=None,
+                     metricas=None) -> ServidorPool:
+    """
+    Levanta un único servidor para todos los partidos de `registro`
+    (estáticos + estado en memoria + /events) en un hilo daemon.
+    `prefijo` es la ruta URL donde viven salida.html y estado.json del principal;
+    `api`, si se da, atiende los POST de comandos; `metricas()` arma /metrics.
+    Lanza OSError si el puerto está ocupado.
+    """
+    handler = type("Handler", (_Handler,), {"registro": registro, "prefijo": prefijo,
+                                            "api": staticmethod(api) if api else None,
+                                            "metricas": staticmethod(metricas) if metricas else None})
+    httpd = ServidorPool(("", port), partial(handler, directory=directorio))
+    threading.Thread(target=httpd.serve_forever, name=f"http-{port}", daemon=True).start()
+    return httpd
+
+def detener_servidor(httpd: ServidorPool, registro: Registro = None):
+    if registro is not None:
+        registro.cerrar()
+    httpd.shutdown()
+    httpd.server_close()
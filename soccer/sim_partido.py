@@ -0,0 +1,159 @@
+"""
+Partidos completos simulados con reloj falso (sin esperar 90 minutos):
+comprueba que el reloj se para exactamente en 45', 90' y al final del
+tiempo añadido, que los overlays vencen y se encadenan en su instante
+exacto, y que un salto de la hora del sistema no mueve el reloj real.
+Al final muestra los tiempos de render contra el presupuesto de un frame.
+
+Uso:  python sim_partido.py [n_partidos_aleatorios] [semilla]
+"""
+import os
+import sys
+import random
+import shutil
+
+from comun import obtener_config, leer_equipos, BITACORA_DIR, MATCH_DIR
+from motor import Motor
+from reloj import RelojFalso, RelojSistema
+from metricas import METRICAS, PRESUPUESTO_MS
+
+MIN = 60 * 1000
+
+def nuevo_partido(motor: Motor, id_partido: str, config: dict, colores: dict, imagenes: dict):
+    p = motor.crear(id_partido, config, colores, imagenes)
+    p.reset()  # por si quedó bitácora de una corrida anterior
+    return p
+
+def partido_guionado(motor: Motor, p):
+    reloj = motor.reloj
+    # 1T: corre de corrido y el motor lo para en 45:00 exacto
+    p.iniciar_reloj()
+    motor.avanzar(50 * MIN)
+    assert not p.running and p.tiempo_total_ms() == 45 * MIN, p.reloj_txt()
+    # +3 anunciados: sigue hasta 48:00 exacto
+    p.tiempo_anadido(3)
+    p.iniciar_reloj()
+    motor.avanzar(2 * MIN)
+    assert p.running and p.reloj_txt() == "47:00", p.reloj_txt()
+    motor.avanzar(10 * MIN)
+    assert not p.running and p.tiempo_total_ms() == 48 * MIN, p.reloj_txt()
+
+    # 2T con pausas, gol + tarjeta encolada detrás del overlay del gol
+    p.set_periodo(2)
+    p.iniciar_reloj()
+    motor.avanzar(10 * MIN)
+    t_gol = reloj.ahora_ms()
+    p.gol("local")
+    p.mostrar_overlay("goal", {"equipo": "local"}, fondo_key="normal", dur_ms=5500)
+    p.tarjeta("visita", "4 X", "amarilla", dur_ms=5500)
+    assert p.agenda.actual["tipo"] == "goal"
+    motor.avanzar(5500)
+    assert p.agenda.actual["tipo"] == "card" and p.agenda.actual["vence_ms"] == t_gol + 11000
+    motor.avanzar(5500)
+    assert p.agenda.actual is None and not p.flash
+    # dos goles seguidos por la API: el anotador del segundo no pisa el overlay del primero
+    motor.comandos.ejecutar("sim", {"cmd": "gol", "equipo": "local", "jugador": "9 A"})
+    motor.comandos.ejecutar("sim", {"cmd": "gol", "equipo": "local", "jugador": "10 B", "politica": "cola"})
+    assert [o["data"]["jugador"] for o in p.agenda.pendientes(reloj.ahora_ms())] == ["9 A", "10 B"]
+    motor.avanzar(11000)
+    assert p.agenda.actual is None
+    p.pausar_reloj()
+    motor.avanzar(3 * MIN)  # pausa: no corre
+    assert p.reloj_txt() == "55:22", p.reloj_txt()
+    p.iniciar_reloj()
+    motor.avanzar(60 * MIN)
+    assert not p.running and p.tiempo_total_ms() == 90 * MIN, p.reloj_txt()
+    p.tiempo_anadido(4)
+    p.iniciar_reloj()
+    motor.avanzar(10 * MIN)
+    assert not p.running and p.tiempo_total_ms() == 94 * MIN, p.reloj_txt()
+    print("guionado OK: 45:00, 48:00, 90:00, 94:00 exactos; overlays encadenados en t+5500/t+11000")
+
+def partido_aleatorio(motor: Motor, p, rnd: random.Random) -> int:
+    """Pausas, añadidos y eventos al azar; el reloj nunca pasa el límite."""
+    eventos = 0
+    for periodo in (1, 2):
+        p.set_periodo(periodo)
+        if rnd.random() < 0.5:
+            p.tiempo_anadido(rnd.randint(1, 6))
+        p.iniciar_reloj()
+        while p.running:
+            paso = rnd.randint(1, 8 * MIN)
+            motor.avanzar(paso)
+            assert p.tiempo_total_ms() <= p.limite_ms(), (p.reloj_txt(), p.limite_ms())
+            r = rnd.random()
+            if r < 0.2:
+                p.gol(rnd.choice(("local", "visita")))
+                p.mostrar_overlay("goal", {}, fondo_key="normal", dur_ms=5500)
+            elif r < 0.3:
+                p.tarjeta(rnd.choice(("local", "visita")), "", rnd.choice(("amarilla", "roja")))
+            elif r < 0.4 and p.running:
+                p.pausar_reloj()
+                motor.avanzar(rnd.randint(1, 5 * MIN))
+                p.iniciar_reloj()
+            eventos += 1
+        assert p.tiempo_total_ms() == p.limite_ms(), (p.reloj_txt(), p.limite_ms())
+    motor.avanzar(MIN)
+    assert p.agenda.actual is None and not p.agenda.pendientes(motor.reloj.ahora_ms())
+    return eventos
+
+def cambio_de_logo(p):
+    """
+    Un cambio que sólo está en el HTML (marca, escala) llega a salida.html,
+    también por aplicar_config(), el camino de la ventana de Configuracion.
+    """
+    rel = "marcador.png" if p.config.get("brand_logo") != "marcador.png" else "../stats.png"
+    p.config["brand_logo"] = rel
+    p.render("equipos")
+    p.config["bug_scale"] = 0.5
+    p.aplicar_config()
+    p.escritor.vaciar()
+    with open(p.ruta_html, encoding="utf-8") as f:
+        html = f.read()
+    url = p.manifiesto.url(rel, "marca")
+    assert url in html and html == p.html_prev, url
+    assert "--bug-scale: 0.50" in html
+    assert p.manifiesto.optimizador is None or p.manifiesto.optimizador.escala == 0.5
+    print(f"marca y escala nuevas en salida.html sin otro cambio de estado ({url})")
+
+def salto_de_hora():
+    """El reloj real no se mueve si la hora del sistema salta una hora."""
+    fuentes = {"pared": 1_700_000_000_000 * 10**6, "mono": 5 * 10**9}
+    reloj = RelojSistema(pared_ns=lambda: fuentes["pared"], monotono_ns=lambda: fuentes["mono"])
+    antes = reloj.ahora_ms()
+    assert antes == 1_700_000_000_000, antes  # anclado a la hora de pared al arrancar
+    fuentes["pared"] += 3600 * 10**9  # NTP / cambio de hora
+    fuentes["mono"] += 250 * 10**6    # lo que de verdad pasó
+    despues = reloj.ahora_ms()
+    assert despues - antes == 250, despues - antes
+    print(f"salto de +1h en la hora del sistema: el reloj avanzó {despues - antes} ms (250 ms reales)")
+
+def main(n: int = 50, semilla: int = 1):
+    config = obtener_config()
+    _, colores, imagenes = leer_equipos()
+    motor = Motor(reloj=RelojFalso())
+    ids = []
+    try:
+        ids.append("sim")
+        partido_guionado(motor, nuevo_partido(motor, "sim", config, colores, imagenes))
+        cambio_de_logo(motor.obtener("sim"))
+        rnd = random.Random(semilla)
+        eventos = 0
+        for i in range(n):
+            ids.append(f"sim-{i}")
+            eventos += partido_aleatorio(motor, nuevo_partido(motor, ids[-1], config, colores, imagenes), rnd)
+            motor.quitar(ids[-1])
+        print(f"{n} partidos aleatorios OK ({eventos} pasos), fin de periodo siempre en el límite exacto")
+        salto_de_hora()
+        r = METRICAS.foto()["etapas"]["render"]
+        print(f"render: {r['n']} renders, p50 {r['p50_ms']:.2f} ms, p99 {r['p99_ms']:.2f} ms, max {r['max_ms']:.2f} ms; "
+              f"{r['sobre_presupuesto']} sobre el presupuesto de {PRESUPUESTO_MS:.1f} ms")
+    finally:
+        motor.cerrar()
+        for id_partido in ids:
+            shutil.rmtree(os.path.join(BITACORA_DIR, id_partido), ignore_errors=True)
+            shutil.rmtree(os.path.join(MATCH_DIR, id_partido), ignore_errors=True)
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 50,
+         int(sys.argv[2]) if len(sys.argv) > 2 else 1)